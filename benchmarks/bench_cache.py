@@ -0,0 +1,132 @@
+"""Cache backends: ``LocMemCache``, ``FileBasedCache`` and the shared
+``core.cache.SQLiteCache``.
+
+The first table is the cost of one operation in a single process. The
+second runs ``--processes`` workers against one cache, the way server
+workers share it: throughput of a read-mostly mix, and how many of the
+concurrent ``incr`` calls survived. Every ``LocMemCache`` worker only sees
+its own copy, and ``FileBasedCache`` increments by read-modify-write::
+
+    python -m benchmarks.bench_cache --processes 4
+"""
+import argparse
+import multiprocessing
+import shutil
+import tempfile
+import time
+
+from benchmarks.common import measure, setup, summary
+
+KEYS = 1000
+BATCH = 10
+OPS_PER_CALL = 100
+VALUE = {'text': 'x' * 200, 'ids': list(range(20))}
+# One write in ten, the rest reads.
+WRITE_EVERY = 10
+
+
+def backends(directory):
+    from django.core.cache.backends.filebased import FileBasedCache
+    from django.core.cache.backends.locmem import LocMemCache
+
+    from core.cache import SQLiteCache
+
+    return {
+        'locmem': lambda: LocMemCache('bench', {
+            'OPTIONS': {'MAX_ENTRIES': KEYS * 10}}),
+        'filebased': lambda: FileBasedCache(f'{directory}/files', {
+            'OPTIONS': {'MAX_ENTRIES': KEYS * 10}}),
+        'sqlite': lambda: SQLiteCache(f'{directory}/cache.sqlite3', {}),
+    }
+
+
+def operations(cache):
+    keys = [f'key{i}' for i in range(KEYS)]
+    batches = [keys[i:i + BATCH] for i in range(0, KEYS, BATCH)]
+    cache.set('counter', 0, None)
+    counter = iter(range(10 ** 9))
+
+    def repeated(func):
+        def run():
+            for _ in range(OPS_PER_CALL):
+                func(next(counter))
+        return run
+
+    return {
+        'set': repeated(lambda i: cache.set(keys[i % KEYS], VALUE)),
+        'get, hit': repeated(lambda i: cache.get(keys[i % KEYS])),
+        'get, miss': repeated(lambda i: cache.get(f'missing{i}')),
+        f'set_many({BATCH})': repeated(lambda i: cache.set_many(
+            dict.fromkeys(batches[i % len(batches)], VALUE))),
+        f'get_many({BATCH})': repeated(
+            lambda i: cache.get_many(batches[i % len(batches)])),
+        'incr': repeated(lambda i: cache.incr('counter')),
+    }
+
+
+def worker(make_cache, seconds, results):
+    cache = make_cache()
+    ops = increments = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        key = f'key{ops % KEYS}'
+        if ops % WRITE_EVERY == 0:
+            cache.set(key, VALUE)
+            cache.incr('counter')
+            increments += 1
+        else:
+            cache.get(key)
+        ops += 1
+    results.put((ops, increments))
+
+
+def shared(make_cache, processes, seconds):
+    """Return total ops/s and the share of increments that were kept."""
+    make_cache().set('counter', 0, None)
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    workers = [context.Process(target=worker,
+                               args=(make_cache, seconds, results))
+               for _ in range(processes)]
+    for process in workers:
+        process.start()
+    totals = [results.get() for _ in workers]
+    for process in workers:
+        process.join()
+    ops = sum(ops for ops, _ in totals)
+    increments = sum(increments for _, increments in totals)
+    return ops / seconds, make_cache().get('counter') / increments
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=2)
+    args = parser.parse_args()
+
+    setup()
+    directory = tempfile.mkdtemp()
+    caches = backends(directory)
+
+    print(f'{"backend":<12}{"operation":<16}{"p50, us":>10}{"p95, us":>10}')
+    for name, make_cache in caches.items():
+        cache = make_cache()
+        for operation, func in operations(cache).items():
+            result = summary(measure(func, repeat=args.repeat))
+            print(f'{name:<12}{operation:<16}'
+                  f'{result["p50_ms"] * 1000 / OPS_PER_CALL:>10.1f}'
+                  f'{result["p95_ms"] * 1000 / OPS_PER_CALL:>10.1f}')
+        cache.clear()
+
+    print(f'\n{args.processes} processes, {WRITE_EVERY - 1}:1 reads to '
+          f'writes')
+    print(f'{"backend":<12}{"ops/s":>12}{"incr kept":>12}')
+    for name, make_cache in caches.items():
+        ops, kept = shared(make_cache, args.processes, args.seconds)
+        print(f'{name:<12}{ops:>12.0f}{kept:>12.1%}')
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
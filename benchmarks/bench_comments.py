@@ -0,0 +1,93 @@
+"""Comments per second under concurrent writers, direct and queued.
+
+``--writers`` threads each save ``--comments`` comments on one post, the
+way concurrent ``add_comment`` requests do: directly, every request in its
+own transactions, or through the single writer of
+``posts.comment_queue``. The test database is a file, as in production,
+since an in-memory SQLite database never reports "database is locked"::
+
+    python -m benchmarks.bench_comments --writers 50
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from benchmarks.common import setup, summary
+
+
+def run(post, author, writers, comments, queued):
+    """Return the comments written per second, latencies and failures."""
+    from django.db import OperationalError, connection
+    from django.test import override_settings
+
+    from posts.comment_queue import save_comment
+    from posts.models import Comment
+
+    latencies, failures = [], []
+    start_line = threading.Barrier(writers)
+
+    def writer(number):
+        start_line.wait()
+        for i in range(comments):
+            comment = Comment(post=post, author=author,
+                              text=f'comment {number}-{i}')
+            start = time.perf_counter()
+            try:
+                save_comment(comment)
+            except OperationalError as error:
+                failures.append(error)
+            else:
+                latencies.append(time.perf_counter() - start)
+        connection.close()
+
+    threads = [threading.Thread(target=writer, args=(number,))
+               for number in range(writers)]
+    with override_settings(COMMENT_WRITE_QUEUE=queued):
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        seconds = time.perf_counter() - start
+    return len(latencies) / seconds, latencies, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--writers', type=int, default=50)
+    parser.add_argument('--comments', type=int, default=20)
+    args = parser.parse_args()
+
+    from django.conf import settings
+    directory = tempfile.mkdtemp()
+    settings.DATABASES['default']['TEST'] = {
+        'NAME': os.path.join(directory, 'bench.sqlite3')}
+    setup()
+    from django.contrib.auth import get_user_model
+
+    from posts.models import Post
+
+    author = get_user_model().objects.create_user(username='bench')
+    post = Post.objects.create(text='bench', author=author)
+
+    print(f'{args.writers} writers x {args.comments} comments')
+    print(f'{"mode":<10}{"comments/s":>12}{"p50, ms":>10}{"p95, ms":>10}'
+          f'{"locked":>10}')
+    for mode, queued in (('direct', False), ('queued', True)):
+        rate, latencies, failures = run(post, author, args.writers,
+                                        args.comments, queued)
+        result = summary(latencies) if latencies else {
+            'p50_ms': 0, 'p95_ms': 0}
+        print(f'{mode:<10}{rate:>12.0f}{result["p50_ms"]:>10.1f}'
+              f'{result["p95_ms"]:>10.1f}{len(failures):>10}')
+    post.refresh_from_db()
+    print(f'comment_count {post.comment_count}, '
+          f'rows {post.comments.count()}')
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""Media serving throughput: ``django.views.static.serve`` against
+``core.media.serve_media``.
+
+Both views are called directly with the same requests, so the numbers
+show the cost of the serving path alone. ``static.serve`` can answer
+neither a range nor an entity tag; the offloaded case only returns the
+``X-Accel-Redirect`` header. Behind a WSGI server a whole-file
+``FileResponse`` goes through ``wsgi.file_wrapper`` (usually
+``sendfile``), which this loop does not measure::
+
+    python -m benchmarks.bench_media --size 100 --size 2048
+"""
+import argparse
+import os
+import shutil
+import tempfile
+
+from benchmarks.common import measure, setup, summary
+
+DEFAULT_SIZES_KB = (100, 2048)
+RANGE_BYTES = 64 * 1024
+
+
+def consume(response):
+    """Read the body the way a WSGI server would; return its length."""
+    if response.streaming:
+        body = sum(len(chunk) for chunk in response.streaming_content)
+    else:
+        body = len(response.content)
+    response.close()
+    return body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', type=int, action='append',
+                        help='File size in KiB, may be repeated.')
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    setup()
+    from django.test import RequestFactory
+    from django.test.utils import override_settings
+    from django.views import static
+
+    from core.media import serve_media
+
+    media_root = tempfile.mkdtemp()
+    factory = RequestFactory()
+    print(f'{"case":<28}{"status":>7}{"bytes":>10}'
+          f'{"p50, ms":>10}{"p95, ms":>10}{"MB/s":>10}')
+    for size_kb in args.size or DEFAULT_SIZES_KB:
+        name = f'bench-{size_kb}.jpg'
+        with open(os.path.join(media_root, name), 'wb') as file:
+            file.write(os.urandom(size_kb * 1024))
+        with override_settings(MEDIA_ROOT=media_root):
+            first = serve_media(factory.get('/'), name)
+            consume(first)
+            validators = {
+                'HTTP_IF_NONE_MATCH': first['ETag'],
+                'HTTP_IF_MODIFIED_SINCE': first['Last-Modified'],
+            }
+            ranged = {'HTTP_RANGE': f'bytes=0-{RANGE_BYTES - 1}'}
+
+            def static_serve(**headers):
+                return lambda: static.serve(factory.get('/', **headers),
+                                            name, document_root=media_root)
+
+            def media(**headers):
+                return lambda: serve_media(factory.get('/', **headers), name)
+
+            cases = {
+                'static.serve': (static_serve(), {}),
+                'static.serve, 304': (static_serve(
+                    HTTP_IF_MODIFIED_SINCE=first['Last-Modified']), {}),
+                'static.serve, range': (static_serve(**ranged), {}),
+                'serve_media': (media(), {}),
+                'serve_media, 304': (media(**validators), {}),
+                'serve_media, range': (media(**ranged), {}),
+                'serve_media, sendfile': (
+                    media(), {'MEDIA_SENDFILE': 'X-Accel-Redirect'}),
+            }
+            print(f'-- {size_kb} KiB')
+            for label, (view, overrides) in cases.items():
+                with override_settings(**overrides):
+                    response = view()
+                    status, sent = response.status_code, consume(response)
+                    result = summary(measure(lambda: consume(view()),
+                                             repeat=args.repeat))
+                throughput = sent / result['p50_ms'] / 1000
+                print(f'{label:<28}{status:>7}{sent:>10}'
+                      f'{result["p50_ms"]:>10.3f}{result["p95_ms"]:>10.3f}'
+                      f'{throughput:>10.1f}')
+    shutil.rmtree(media_root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
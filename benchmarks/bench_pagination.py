@@ -0,0 +1,72 @@
+"""Compare OFFSET pagination with cursor pagination on a deep page.
+
+With cursor pagination page 10,000 costs about as much as page 1, while
+``?page=10000`` has to walk over every row before the offset.
+"""
+import argparse
+
+from benchmarks.common import measure, setup, summary
+
+PER_PAGE = 10
+
+
+def seed(posts_count):
+    from django.contrib.auth import get_user_model
+
+    from posts.models import Post
+
+    author = get_user_model().objects.create_user(username='bench')
+    Post.objects.bulk_create(
+        (Post(text=f'post {i}', author=author) for i in range(posts_count)),
+        batch_size=500,
+    )
+    return author
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--page', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    setup()
+    from django.test import Client
+
+    from posts.models import Post
+    from posts.paginators import FEED_ORDERING, FeedPaginator, encode_cursor
+
+    author = seed(args.page * PER_PAGE)
+    posts = Post.objects.select_related('author', 'group')
+    cursor = encode_cursor(
+        posts.order_by(*FEED_ORDERING)[(args.page - 1) * PER_PAGE - 1])
+
+    def offset_page(number):
+        return lambda: list(FeedPaginator(posts, PER_PAGE).page(number))
+
+    def cursor_page(after):
+        return lambda: list(
+            FeedPaginator(posts, PER_PAGE).get_cursor_page(after=after))
+
+    # Feed pages are cached for anonymous visitors only: log in so that
+    # every call paginates.
+    client = Client()
+    client.force_login(author)
+    cases = {
+        'offset page 1': offset_page(1),
+        f'offset page {args.page}': offset_page(args.page),
+        'cursor page 1': cursor_page(None),
+        f'cursor page {args.page}': cursor_page(cursor),
+        'view /?page=1': lambda: client.get('/', {'page': 1}),
+        f'view /?page={args.page}': lambda: client.get(
+            '/', {'page': args.page}),
+        f'view /?after=<page {args.page}>': lambda: client.get(
+            '/', {'after': cursor}),
+    }
+    print(f'{"case":<32}{"p50, ms":>10}{"p95, ms":>10}')
+    for name, func in cases.items():
+        result = summary(measure(func, repeat=args.repeat))
+        print(f'{name:<32}{result["p50_ms"]:>10.2f}{result["p95_ms"]:>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""Thumbnail store round trips and image bytes for one feed page.
+
+Looking thumbnails up tag by tag costs a cache round trip per post and
+size, plus a database query for every key the cache has not seen.
+``thumbnails.prefetch`` resolves the whole page with one ``get_many``.
+The second table shows the median size of every responsive variant::
+
+    python -m benchmarks.bench_thumbnails --posts 100
+"""
+import argparse
+import io
+import shutil
+import statistics
+import tempfile
+
+from benchmarks.common import measure, setup, summary
+
+PER_PAGE = 10
+CACHE_METHODS = ('get', 'get_many', 'set', 'set_many')
+
+
+def count_round_trips(func):
+    """Return the number of store cache calls and queries ``func`` makes."""
+    from contextlib import ExitStack
+    from unittest import mock
+
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from sorl.thumbnail import default
+
+    kv_cache = default.kvstore.cache
+    calls = []
+    depth = []
+
+    def counted(method):
+        # Backends implement some methods on top of others; count only the
+        # outermost call.
+        def wrapper(*args, **kwargs):
+            if not depth:
+                calls.append(method.__name__)
+            depth.append(method)
+            try:
+                return method(*args, **kwargs)
+            finally:
+                depth.pop()
+        return wrapper
+
+    with ExitStack() as stack:
+        for name in CACHE_METHODS:
+            stack.enter_context(mock.patch.object(
+                kv_cache, name, counted(getattr(kv_cache, name))))
+        queries = stack.enter_context(CaptureQueriesContext(connection))
+        func()
+    return len(calls), len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--posts', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    setup()
+    from django.conf import settings
+    from django.core.cache import caches
+    from django.core.management import call_command
+    from django.test.utils import override_settings
+
+    from posts import thumbnails
+    from posts.models import Post
+    from posts.paginators import FEED_ORDERING
+
+    media_root = tempfile.mkdtemp()
+    with override_settings(MEDIA_ROOT=media_root):
+        call_command('seed_yatube', users=10, posts=args.posts, follows=0,
+                     comments=0, images=PER_PAGE, image_share=1,
+                     stdout=io.StringIO())
+        call_command('thumbnail_worker', '--once', '--all',
+                     stdout=io.StringIO())
+
+        def page():
+            return list(Post.objects.order_by(*FEED_ORDERING)[:PER_PAGE])
+
+        def per_tag(posts):
+            return lambda: [thumbnails.ready_thumbnail(post.image, size)
+                            for post in posts
+                            for size in thumbnails.THUMBNAIL_SIZES]
+
+        def batched(posts):
+            return lambda: thumbnails.prefetch(posts)
+
+        kv_cache = caches[settings.THUMBNAIL_CACHE]
+        cases = {'per tag': per_tag, 'batched': batched}
+        print(f'{"case":<20}{"cache calls":>12}{"queries":>9}'
+              f'{"p50, ms":>10}{"p95, ms":>10}')
+        for warm in (False, True):
+            for name, case in cases.items():
+                func = case(page())
+                prepare = None if warm else kv_cache.clear
+                if warm:
+                    func()
+                else:
+                    kv_cache.clear()
+                calls, queries = count_round_trips(func)
+                result = summary(measure(func, repeat=args.repeat,
+                                         prepare=prepare))
+                label = f'{name}, {"warm" if warm else "cold"}'
+                print(f'{label:<20}{calls:>12}{queries:>9}'
+                      f'{result["p50_ms"]:>10.2f}{result["p95_ms"]:>10.2f}')
+
+        posts = page()
+        storage = Post._meta.get_field('image').storage
+        variants = {'original': [storage.size(post.image.name)
+                                 for post in posts]}
+        for size in thumbnails.THUMBNAIL_SIZES:
+            variants[size] = [
+                storage.size(thumbnails.ready_thumbnail(post.image, size).name)
+                for post in posts]
+        print(f'\n{"variant":<20}{"median bytes":>14}')
+        for size, sizes in variants.items():
+            print(f'{size:<20}{statistics.median(sizes):>14.0f}')
+    shutil.rmtree(media_root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,194 @@
+"""Latency, query count and page size of every ``posts`` URL.
+
+Seeds 10^3 to 10^6 posts (with users, follows and comments in proportion)
+with the ``seed_yatube`` command and drives each URL of ``posts/urls.py``
+through the Django test client::
+
+    python -m benchmarks.bench_views --posts 1000 10000 --output run.json
+    python -m benchmarks.bench_views --posts 1000 --compare run.json
+
+In compare mode a view is reported as a regression when its p50 latency,
+query count or page size grew by more than ``--threshold``.
+"""
+import argparse
+import io
+import json
+import sys
+
+from benchmarks.common import measure, setup, summary
+
+DEFAULT_SCALES = (1000, 10000, 100000, 1000000)
+METRICS = ('p50_ms', 'queries', 'bytes')
+FOLLOW_VIEWS = ('profile_follow', 'profile_unfollow',
+                'profile_follow_json', 'profile_unfollow_json')
+# Any other status, such as a 405 for a GET of a POST-only view, means the
+# timings are not of the view's real work.
+EXPECTED_STATUS = {
+    'add_comment': 302,
+    'add_comment_json': 201,
+    'profile_follow': 302,
+    'profile_unfollow': 302,
+}
+
+
+def scale_for(posts):
+    """Return the ``seed_yatube`` options for ``posts`` posts."""
+    users = max(10, posts // 20)
+    return {
+        'users': users,
+        'posts': posts,
+        'follows': users * 10,
+        'comments': posts,
+        'seed': 0,
+    }
+
+
+def url_cases():
+    """Return ``{url name: (method, url, data)}`` for ``posts/urls.py``."""
+    from django.db.models import Count
+    from django.urls import reverse
+
+    from posts.models import Comment, Follow, Group, Post
+    from posts.urls import app_name, urlpatterns
+
+    post = Post.objects.annotate(
+        comments_total=Count('comments')).order_by('-comments_total')[0]
+    follow = Follow.objects.select_related('user', 'author').first()
+    kwargs = {
+        'slug': Group.objects.first().slug,
+        'username': post.author.username,
+        'post_id': post.pk,
+    }
+    text = Comment.objects.first().text
+    data = {
+        'add_comment': {'text': text},
+        'add_comment_json': {'text': text},
+        'profile_follow_json': {},
+        'profile_unfollow_json': {},
+    }
+    cases = {}
+    for pattern in urlpatterns:
+        params = {name: kwargs[name] for name in pattern.pattern.converters}
+        if pattern.name in FOLLOW_VIEWS:
+            params['username'] = follow.author.username
+        url = reverse(f'{app_name}:{pattern.name}', kwargs=params)
+        method = 'post' if pattern.name in data else 'get'
+        cases[pattern.name] = (method, url, data.get(pattern.name))
+    return cases, post.author, follow
+
+
+def run_scale(posts, repeat):
+    from django.core.management import call_command
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import CaptureQueriesContext
+
+    from posts.models import Follow
+
+    call_command('flush', interactive=False, verbosity=0)
+    call_command('seed_yatube', stdout=io.StringIO(), **scale_for(posts))
+    cases, author, follow = url_cases()
+    clients = {}
+    for user in (author, follow.user):
+        clients[user.pk] = Client()
+        clients[user.pk].force_login(user)
+
+    def unfollowed():
+        Follow.objects.filter(user=follow.user, author=follow.author).delete()
+
+    def followed():
+        Follow.objects.get_or_create(user=follow.user, author=follow.author)
+
+    # Follow and unfollow need the row absent and present respectively.
+    prepare = {
+        'profile_follow': unfollowed,
+        'profile_unfollow': followed,
+        'profile_follow_json': unfollowed,
+        'profile_unfollow_json': followed,
+    }
+    results = {}
+    for name, (method, url, data) in cases.items():
+        user = follow.user if 'follow' in name else author
+        client = clients[user.pk]
+
+        def request():
+            return getattr(client, method)(url, data)
+
+        timings = measure(request, repeat=repeat,
+                          prepare=prepare.get(name))
+        if name in prepare:
+            prepare[name]()
+        with CaptureQueriesContext(connection) as queries:
+            response = request()
+        expected = EXPECTED_STATUS.get(name, 200)
+        if response.status_code != expected:
+            sys.exit(f'{url}: status {response.status_code}, '
+                     f'expected {expected}')
+        results[name] = dict(
+            summary(timings),
+            status=response.status_code,
+            queries=len(queries),
+            bytes=len(response.content),
+        )
+    return results
+
+
+def print_results(posts, results):
+    print(f'\n{posts} posts')
+    print(f'{"view":<20}{"p50, ms":>10}{"p95, ms":>10}'
+          f'{"queries":>9}{"bytes":>10}')
+    for name, row in results.items():
+        print(f'{name:<20}{row["p50_ms"]:>10.2f}{row["p95_ms"]:>10.2f}'
+              f'{row["queries"]:>9}{row["bytes"]:>10}')
+
+
+def compare(report, baseline, threshold):
+    """Return the regressions of ``report`` against ``baseline``."""
+    regressions = []
+    for posts, views in report.items():
+        for name, row in views.items():
+            old = baseline.get(posts, {}).get(name)
+            if old is None:
+                continue
+            for metric in METRICS:
+                if old[metric] and row[metric] > old[metric] * (
+                        1 + threshold):
+                    regressions.append(
+                        f'{posts} posts, {name}: {metric} '
+                        f'{old[metric]:.2f} -> {row[metric]:.2f}')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--posts', type=int, nargs='+',
+                        default=list(DEFAULT_SCALES))
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--output', help='Write the results as JSON.')
+    parser.add_argument('--compare', metavar='BASELINE',
+                        help='JSON results of an earlier run.')
+    parser.add_argument('--threshold', type=float, default=0.2)
+    args = parser.parse_args()
+
+    setup()
+    report = {}
+    for posts in args.posts:
+        report[str(posts)] = run_scale(posts, args.repeat)
+        print_results(posts, report[str(posts)])
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2)
+    if args.compare:
+        with open(args.compare) as baseline:
+            regressions = compare(report, json.load(baseline),
+                                  args.threshold)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
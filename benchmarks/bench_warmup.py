@@ -0,0 +1,97 @@
+"""First-request latency of a fresh worker, with and without warmup.
+
+Every run is a new Python process, like a recycled server worker: it
+sets Django up, optionally calls ``core.warmup.warmup()`` and then times
+the first request to each page. Later pages of a run are already warmer
+than the first, since they share ``base.html`` and the includes::
+
+    python -m benchmarks.bench_warmup --runs 5
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.common import setup
+
+MODES = ('cold', 'warm')
+
+
+def pages():
+    from django.contrib.auth import get_user_model
+    from django.urls import reverse
+
+    from posts.models import Group, Post
+
+    author = get_user_model().objects.create_user(username='bench')
+    group = Group.objects.create(title='bench', slug='bench')
+    post = Post.objects.create(text='bench', author=author, group=group)
+    return {
+        'index': reverse('posts:main_posts'),
+        'group_list': reverse('posts:group_list', args=[group.slug]),
+        'profile': reverse('posts:profile', args=[author.username]),
+        'post_detail': reverse('posts:post_detail', args=[post.pk]),
+        'login': reverse('users:login'),
+        'about': reverse('about:author'),
+    }
+
+
+def child(mode):
+    """Time the first requests of this process and print them as JSON."""
+    start = time.perf_counter()
+    setup()
+    from django.test import Client
+
+    from core.warmup import warmup
+
+    urls = pages()
+    startup = time.perf_counter() - start
+    warmup_seconds = warmup()['seconds'] if mode == 'warm' else 0
+    client = Client()
+    timings = {}
+    for name, url in urls.items():
+        start = time.perf_counter()
+        client.get(url)
+        timings[name] = time.perf_counter() - start
+    print(json.dumps({'startup': startup, 'warmup': warmup_seconds,
+                      'requests': timings}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--child', choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.child)
+        return
+
+    results = {mode: [] for mode in MODES}
+    for _ in range(args.runs):
+        for mode in MODES:
+            output = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.bench_warmup',
+                 '--child', mode],
+                check=True, capture_output=True, text=True).stdout
+            results[mode].append(json.loads(output.splitlines()[-1]))
+
+    def median_ms(mode, get):
+        return statistics.median(get(run) for run in results[mode]) * 1000
+
+    names = list(results['cold'][0]['requests'])
+    print(f'{"first request, ms":<20}{"cold":>10}{"warm":>10}')
+    for name in names:
+        cold, warm = (median_ms(mode, lambda run: run['requests'][name])
+                      for mode in MODES)
+        print(f'{name:<20}{cold:>10.1f}{warm:>10.1f}')
+    cold, warm = (median_ms(mode, lambda run: sum(run['requests'].values()))
+                  for mode in MODES)
+    print(f'{"all pages":<20}{cold:>10.1f}{warm:>10.1f}')
+    print(f'{"warmup itself":<20}{"":>10}'
+          f'{median_ms("warm", lambda run: run["warmup"]):>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""Helpers shared by the benchmark scripts.
+
+Every script runs against a throwaway test database, with the caches and
+``MEDIA_ROOT`` in temporary directories, so neither ``db.sqlite3`` nor
+the server's cache and media files are touched. Run them from the
+repository root, for example::
+
+    python -m benchmarks.bench_pagination
+"""
+import atexit
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_DIR = os.path.join(ROOT_DIR, 'yatube')
+
+if PROJECT_DIR not in sys.path:
+    sys.path.insert(0, PROJECT_DIR)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+
+def setup():
+    import django
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import override_settings, setup_test_environment
+
+    from core.cache import isolated_caches
+
+    setup_test_environment()
+    cache_dir = tempfile.mkdtemp()
+    atexit.register(shutil.rmtree, cache_dir, ignore_errors=True)
+    isolated_caches(cache_dir).enable()
+    media_root = tempfile.mkdtemp()
+    atexit.register(shutil.rmtree, media_root, ignore_errors=True)
+    override_settings(MEDIA_ROOT=media_root).enable()
+    connection.creation.create_test_db(verbosity=0, keepdb=False)
+
+
+def measure(func, repeat=20, warmup=2, prepare=None):
+    """Call ``func`` several times and return the timings in seconds.
+
+    ``prepare`` runs untimed before every call, for requests that change the
+    state they depend on.
+    """
+    timings = []
+    for i in range(warmup + repeat):
+        if prepare is not None:
+            prepare()
+        start = time.perf_counter()
+        func()
+        if i >= warmup:
+            timings.append(time.perf_counter() - start)
+    return timings
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    index = min(len(values) - 1, round(pct / 100 * (len(values) - 1)))
+    return values[index]
+
+
+def summary(timings):
+    return {
+        'p50_ms': percentile(timings, 50) * 1000,
+        'p95_ms': percentile(timings, 95) * 1000,
+        'mean_ms': statistics.mean(timings) * 1000,
+    }
@@ -0,0 +1,15 @@
+import shutil
+import tempfile
+
+import pytest
+
+
+@pytest.fixture(autouse=True, scope='session')
+def isolated_caches():
+    """Keep the tests off the caches of a running server."""
+    from core.cache import isolated_caches
+
+    directory = tempfile.mkdtemp()
+    with isolated_caches(directory):
+        yield
+    shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,320 @@
+"""A cache shared by every process on one host, kept in a SQLite file.
+
+``LocMemCache`` gives each server process its own cache: every worker
+starts cold, an invalidation in one worker never reaches the others and
+memory grows with the number of workers. :class:`SQLiteCache` keeps one
+cache in a SQLite database in WAL mode, where readers never wait for the
+writer.
+
+- Entries expire after their timeout and are evicted least recently used
+  first once ``MAX_BYTES`` is exceeded. The running total is kept by
+  triggers, so it never needs a ``SUM`` over the table.
+- Integers are stored as SQLite integers, not pickles, so ``incr`` and
+  ``decr`` are an ``UPDATE`` in place, read back in the same transaction.
+- SQLite 3.25 or later is required (``MIN_SQLITE_VERSION``).
+- ``get_many`` and ``set_many`` take one statement and one transaction.
+
+A read records its access only if the entry has not been touched for
+``TOUCH_INTERVAL`` seconds, so hot keys do not turn every read into a
+write; the eviction order is least recently used to that precision.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.exceptions import ImproperlyConfigured
+
+MAX_BYTES = 64 * 1024 * 1024
+# Eviction frees a little more than needed so it does not run on every set.
+CULL_TARGET = 0.9
+TOUCH_INTERVAL = 1.0
+BUSY_TIMEOUT_MS = 5000
+# SQLite limits the number of parameters of one statement.
+MAX_PARAMS = 500
+# The upsert needs 3.24 and the window function of the eviction 3.25.
+MIN_SQLITE_VERSION = (3, 25, 0)
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires REAL,
+    accessed REAL NOT NULL,
+    size INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed);
+CREATE TABLE IF NOT EXISTS cache_size (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    bytes INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO cache_size VALUES (0, 0);
+CREATE TRIGGER IF NOT EXISTS cache_insert AFTER INSERT ON cache BEGIN
+    UPDATE cache_size SET bytes = bytes + NEW.size;
+END;
+CREATE TRIGGER IF NOT EXISTS cache_delete AFTER DELETE ON cache BEGIN
+    UPDATE cache_size SET bytes = bytes - OLD.size;
+END;
+CREATE TRIGGER IF NOT EXISTS cache_update AFTER UPDATE OF size ON cache
+BEGIN
+    UPDATE cache_size SET bytes = bytes - OLD.size + NEW.size;
+END;
+'''
+LIVE = '(expires IS NULL OR expires > ?)'
+UPSERT = (
+    'INSERT INTO cache (key, value, expires, accessed, size) '
+    'VALUES (?, ?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET '
+    'value = excluded.value, expires = excluded.expires, '
+    'accessed = excluded.accessed, size = excluded.size'
+)
+
+
+@contextmanager
+def _transaction(db):
+    # IMMEDIATE takes the write lock up front: a deferred transaction that
+    # upgrades later can fail with SQLITE_BUSY instead of waiting.
+    db.execute('BEGIN IMMEDIATE')
+    try:
+        yield
+    except BaseException:
+        db.execute('ROLLBACK')
+        raise
+    db.execute('COMMIT')
+
+
+def _chunks(items, size=MAX_PARAMS):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class SQLiteCache(BaseCache):
+    """Cache backend in the SQLite file ``LOCATION``.
+
+    ``OPTIONS['MAX_BYTES']`` is the budget for keys and values together.
+    """
+
+    def __init__(self, location, params):
+        if sqlite3.sqlite_version_info < MIN_SQLITE_VERSION:
+            raise ImproperlyConfigured(
+                f'SQLiteCache needs SQLite '
+                f'{".".join(map(str, MIN_SQLITE_VERSION))} or later, '
+                f'found {sqlite3.sqlite_version}.')
+        super().__init__(params)
+        self.location = location
+        options = params.get('OPTIONS', {})
+        self.max_bytes = int(options.get('MAX_BYTES', MAX_BYTES))
+        self._local = threading.local()
+
+    @property
+    def _db(self):
+        # One connection per thread, and a new one after a fork.
+        db = getattr(self._local, 'db', None)
+        if db is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(self.location)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(self.location, timeout=BUSY_TIMEOUT_MS / 1000,
+                                 isolation_level=None,
+                                 check_same_thread=False)
+            db.execute(f'PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}')
+            db.execute('PRAGMA journal_mode = WAL')
+            db.execute('PRAGMA synchronous = NORMAL')
+            # executescript() commits first, so the script has its own.
+            db.executescript(f'BEGIN IMMEDIATE; {SCHEMA} COMMIT;')
+            self._local.db = db
+            self._local.pid = os.getpid()
+        return db
+
+    @staticmethod
+    def _encode(value):
+        # bool is an int subclass but has to come back as a bool.
+        if type(value) is int and -2 ** 63 <= value < 2 ** 63:
+            return value
+        return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def _decode(value):
+        return value if isinstance(value, int) else pickle.loads(value)
+
+    def _row(self, key, value, timeout, now):
+        value = self._encode(value)
+        size = len(key) + (8 if isinstance(value, int) else len(value))
+        return key, value, self._expires(timeout, now), now, size
+
+    def _expires(self, timeout, now):
+        """Return the expiry time; a timeout of 0 expires at once."""
+        if timeout == DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        return None if timeout is None else now + timeout
+
+    def _prepare(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._prepare(key, version)
+        now = time.time()
+        row = self._row(key, value, timeout, now)
+        db = self._db
+        with _transaction(db):
+            # Replace the entry only if it has expired.
+            added = db.execute(
+                UPSERT + ' WHERE cache.expires IS NOT NULL '
+                'AND cache.expires <= ?', (*row, now)).rowcount
+            self._cull(db, now)
+        return bool(added)
+
+    def get(self, key, default=None, version=None):
+        key = self._prepare(key, version)
+        return self._get_many([key]).get(key, default)
+
+    def get_many(self, keys, version=None):
+        keys = {self._prepare(key, version): key for key in keys}
+        found = self._get_many(list(keys))
+        return {keys[key]: value for key, value in found.items()}
+
+    def _get_many(self, keys):
+        db = self._db
+        now = time.time()
+        found = {}
+        stale = []
+        for chunk in _chunks(keys):
+            marks = ', '.join('?' * len(chunk))
+            rows = db.execute(
+                f'SELECT key, value, accessed FROM cache '
+                f'WHERE key IN ({marks}) AND {LIVE}', (*chunk, now))
+            for key, value, accessed in rows:
+                found[key] = self._decode(value)
+                if accessed < now - TOUCH_INTERVAL:
+                    stale.append(key)
+        if stale:
+            self._touch_accessed(db, stale, now)
+        return found
+
+    def _touch_accessed(self, db, keys, now):
+        try:
+            with _transaction(db):
+                for chunk in _chunks(keys):
+                    marks = ', '.join('?' * len(chunk))
+                    db.execute(
+                        f'UPDATE cache SET accessed = ? '
+                        f'WHERE key IN ({marks})', (now, *chunk))
+        except sqlite3.OperationalError:
+            # A busy database only costs the LRU some precision.
+            pass
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        now = time.time()
+        rows = [self._row(self._prepare(key, version), value, timeout, now)
+                for key, value in data.items()]
+        db = self._db
+        with _transaction(db):
+            db.executemany(UPSERT, rows)
+            self._cull(db, now)
+        return []
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._prepare(key, version)
+        now = time.time()
+        db = self._db
+        with _transaction(db):
+            return bool(db.execute(
+                f'UPDATE cache SET expires = ?, accessed = ? '
+                f'WHERE key = ? AND {LIVE}',
+                (self._expires(timeout, now), now, key, now)).rowcount)
+
+    def incr(self, key, delta=1, version=None):
+        key = self._prepare(key, version)
+        now = time.time()
+        db = self._db
+        with _transaction(db):
+            # The write lock is held until the commit, so the SELECT reads
+            # the value this UPDATE wrote.
+            updated = db.execute(
+                f'UPDATE cache SET value = value + ?, accessed = ? '
+                f"WHERE key = ? AND {LIVE} AND typeof(value) = 'integer'",
+                (delta, now, key, now)).rowcount
+            row = db.execute(
+                f'SELECT value FROM cache WHERE key = ? AND {LIVE}',
+                (key, now)).fetchone()
+            if not updated:
+                if row:
+                    raise TypeError(f'Value of {key!r} is not an integer')
+                raise ValueError(f"Key '{key}' not found")
+        return row[0]
+
+    def has_key(self, key, version=None):
+        key = self._prepare(key, version)
+        return self._db.execute(
+            f'SELECT 1 FROM cache WHERE key = ? AND {LIVE}',
+            (key, time.time())).fetchone() is not None
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version)
+
+    def delete_many(self, keys, version=None):
+        keys = [self._prepare(key, version) for key in keys]
+        db = self._db
+        with _transaction(db):
+            for chunk in _chunks(keys):
+                marks = ', '.join('?' * len(chunk))
+                db.execute(f'DELETE FROM cache WHERE key IN ({marks})', chunk)
+
+    def clear(self):
+        db = self._db
+        with _transaction(db):
+            db.execute('DELETE FROM cache')
+
+    def size(self):
+        """Return the bytes of keys and values stored, expired included."""
+        return self._db.execute(
+            'SELECT bytes FROM cache_size').fetchone()[0]
+
+    def _cull(self, db, now):
+        """Evict expired, then least recently used entries over budget."""
+        total = db.execute('SELECT bytes FROM cache_size').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        db.execute('DELETE FROM cache WHERE expires <= ?', (now,))
+        target = self.max_bytes * CULL_TARGET
+        excess = db.execute(
+            'SELECT bytes FROM cache_size').fetchone()[0] - target
+        if excess > 0:
+            # Delete the oldest entries until their sizes add up to the
+            # excess; the window function stops the scan early.
+            db.execute(
+                'DELETE FROM cache WHERE key IN ('
+                ' SELECT key FROM ('
+                '  SELECT key, SUM(size) OVER (ORDER BY accessed'
+                '   ROWS UNBOUNDED PRECEDING) - size AS freed'
+                '  FROM cache ORDER BY accessed)'
+                ' WHERE freed < ?)', (excess,))
+
+    def close(self, **kwargs):
+        # Connections are kept open for the life of the thread.
+        pass
+
+
+def isolated_caches(directory):
+    """Return ``override_settings`` that moves every ``SQLiteCache`` into
+    ``directory``, so tests and benchmarks never share a running server's
+    cache files.
+    """
+    from django.conf import settings
+    from django.test import override_settings
+
+    caches = {}
+    for alias, config in settings.CACHES.items():
+        config = dict(config)
+        if config['BACKEND'] == f'{__name__}.{SQLiteCache.__name__}':
+            config['LOCATION'] = os.path.join(
+                directory, os.path.basename(config['LOCATION']))
+        caches[alias] = config
+    return override_settings(CACHES=caches)
@@ -0,0 +1,138 @@
+"""Serving ``MEDIA_ROOT`` without ``DEBUG``.
+
+``django.views.static.serve`` is meant for development: it reads the whole
+file through Python on every request and knows nothing about ranges or
+entity tags. :func:`serve_media` answers conditional requests with 304,
+serves single byte ranges and marks content-addressed files as immutable.
+With ``MEDIA_SENDFILE`` set it only checks the request and lets the front
+server send the file.
+"""
+import mimetypes
+import os
+import re
+import stat
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (FileResponse, Http404, HttpResponse,
+                         StreamingHttpResponse)
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+
+CHUNK_SIZE = 64 * 1024
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+# Uploads and sorl thumbnails are named after a hash of what they contain.
+HASHED_NAME = re.compile(r'(^|/)[0-9a-f]{32,}\.\w+$')
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+SENDFILE_HEADERS = ('X-Sendfile', 'X-Accel-Redirect')
+
+
+def file_etag(stat_result):
+    """Return an entity tag that changes with the size or the mtime."""
+    return '"%x-%x"' % (stat_result.st_mtime_ns, stat_result.st_size)
+
+
+def parse_range(header, size):
+    """Return ``(start, end)`` of a single byte range, end inclusive.
+
+    ``None`` means the header is to be ignored (missing, malformed or
+    several ranges) and the whole file sent; a range past the end raises
+    ``ValueError``.
+    """
+    match = RANGE.match(header or '')
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start > end or start >= size:
+        raise ValueError('Range not satisfiable')
+    return start, end
+
+
+def read_range(path, start, length):
+    with open(path, 'rb') as file:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                return
+            length -= len(chunk)
+            yield chunk
+
+
+def sendfile_response(path, name):
+    response = HttpResponse()
+    if settings.MEDIA_SENDFILE == 'X-Accel-Redirect':
+        response['X-Accel-Redirect'] = quote(
+            settings.MEDIA_ACCEL_PREFIX + name)
+    else:
+        response['X-Sendfile'] = path
+    # The front server fills these in from the file.
+    del response['Content-Type']
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        stat_result = os.stat(full_path)
+    except (SuspiciousFileOperation, OSError, ValueError):
+        raise Http404
+    if not stat.S_ISREG(stat_result.st_mode):
+        raise Http404
+    etag = file_etag(stat_result)
+    last_modified = int(stat_result.st_mtime)
+    response = get_conditional_response(request, etag=etag,
+                                        last_modified=last_modified)
+    if response is None:
+        response = _file_response(request, full_path, path, stat_result,
+                                  etag)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    if HASHED_NAME.search(path):
+        patch_cache_control(response, public=True,
+                            max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, public=True,
+                            max_age=settings.MEDIA_CACHE_MAX_AGE)
+    return response
+
+
+def _file_response(request, full_path, name, stat_result, etag):
+    if settings.MEDIA_SENDFILE in SENDFILE_HEADERS:
+        # Ranges are left to the front server too.
+        return sendfile_response(full_path, name)
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or 'application/octet-stream'
+    size = stat_result.st_size
+    byte_range = None
+    if request.META.get('HTTP_IF_RANGE', etag) == etag:
+        try:
+            byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+    if byte_range is None:
+        response = FileResponse(open(full_path, 'rb'),
+                                content_type=content_type)
+        response['Content-Length'] = size
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            read_range(full_path, start, end - start + 1),
+            status=206, content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = end - start + 1
+    if encoding:
+        response['Content-Encoding'] = encoding
+    response['Accept-Ranges'] = 'bytes'
+    return response
@@ -0,0 +1,21 @@
+import shutil
+import tempfile
+
+from django.test.runner import DiscoverRunner
+
+from .cache import isolated_caches
+
+
+class IsolatedCacheRunner(DiscoverRunner):
+    """Run the tests against SQLite caches of their own."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.cache_dir = tempfile.mkdtemp()
+        self.caches = isolated_caches(self.cache_dir)
+        self.caches.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.caches.disable()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,24 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.template import engines
+from django.test import SimpleTestCase
+
+from core.warmup import template_names, warmup
+
+
+class WarmupTests(SimpleTestCase):
+    def test_every_template_and_url_is_warmed(self):
+        names = template_names(engines['django'])
+        self.assertIn('posts/index.html', names)
+        self.assertIn('includes/post_card.html', names)
+        self.assertIn('users/login.html', names)
+        done = warmup()
+        self.assertEqual(done['templates'], len(names))
+        self.assertGreater(done['urls'], 0)
+
+    def test_command_reports_counts(self):
+        out = StringIO()
+        call_command('warmup', stdout=out)
+        self.assertIn('templates', out.getvalue())
+        self.assertIn('URLs', out.getvalue())
@@ -0,0 +1,105 @@
+"""Do the work of a worker's first request before it arrives.
+
+The first request of a fresh worker compiles every template it touches,
+imports the tag libraries they load and populates the URL resolver. With
+the cached template loader, used unless ``DEBUG``, all of that is kept for
+the life of the process, so :func:`warmup` does it once at startup:
+``yatube/wsgi.py`` calls it after loading the application, and
+``manage.py warmup`` runs it on demand.
+"""
+import os
+import time
+
+from django.template import engines
+from django.template.backends.django import DjangoTemplates
+from django.urls import (URLPattern, URLResolver, get_resolver, resolve,
+                         reverse)
+from django.urls.converters import IntConverter
+
+URL_MODULES = ('posts.urls', 'users.urls', 'about.urls')
+SAMPLE_VALUES = {IntConverter: 1}
+SAMPLE_VALUE = 'warmup'
+
+
+def _loader_dirs(loaders):
+    for loader in loaders:
+        if hasattr(loader, 'loaders'):
+            yield from _loader_dirs(loader.loaders)
+        else:
+            yield from loader.get_dirs()
+
+
+def template_dirs(backend):
+    """Return the directories the loaders of ``backend`` search."""
+    if isinstance(backend, DjangoTemplates):
+        return list(_loader_dirs(backend.engine.template_loaders))
+    return list(backend.template_dirs)
+
+
+def template_names(backend):
+    """Return the names of every template ``backend`` can load."""
+    names = set()
+    for directory in template_dirs(backend):
+        for root, _, files in os.walk(directory):
+            for file_name in files:
+                if file_name.endswith('.html'):
+                    names.add(os.path.relpath(os.path.join(root, file_name),
+                                              directory))
+    return sorted(names)
+
+
+def compile_templates():
+    """Compile every template into the loaders' caches; return the count."""
+    count = 0
+    for backend in engines.all():
+        for name in template_names(backend):
+            backend.get_template(name)
+            count += 1
+    return count
+
+
+def _patterns(patterns, namespace=''):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _patterns(pattern.url_patterns,
+                                 pattern.namespace or namespace)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            yield namespace, pattern
+
+
+def resolve_urls(modules=URL_MODULES):
+    """Reverse and resolve every named URL of ``modules``; return the count.
+
+    Arguments are filled with sample values by converter, so the resolver
+    builds its reverse dictionaries and compiles every pattern.
+    """
+    modules = set(modules)
+    count = 0
+    for resolver in get_resolver().url_patterns:
+        if not isinstance(resolver, URLResolver):
+            continue
+        if getattr(resolver.urlconf_module, '__name__', '') not in modules:
+            continue
+        for namespace, pattern in _patterns(resolver.url_patterns,
+                                            resolver.namespace):
+            kwargs = {
+                name: SAMPLE_VALUES.get(type(converter), SAMPLE_VALUE)
+                for name, converter in pattern.pattern.converters.items()
+            }
+            name = f'{namespace}:{pattern.name}' if namespace else (
+                pattern.name)
+            resolve(reverse(name, kwargs=kwargs))
+            count += 1
+    return count
+
+
+def warmup():
+    """Compile the templates and the URLs; return what was done and when.
+
+    Returns ``{'templates': n, 'urls': n, 'seconds': t}``.
+    """
+    start = time.perf_counter()
+    templates = compile_templates()
+    urls = resolve_urls()
+    return {'templates': templates, 'urls': urls,
+            'seconds': time.perf_counter() - start}
@@ -0,0 +1,169 @@
+import time
+import uuid
+from functools import wraps
+
+from django.core.cache import cache
+from django.http import HttpResponse
+
+POST_COUNT_TIMEOUT = 60 * 60
+PAGES_VERSION_KEY = 'posts:pages:version'
+PAGE_CACHE_TIMEOUT = 60 * 5
+PAGE_PARAMS = ('page', 'after', 'before')
+FOLLOW_VERSION_KEY = 'posts:follow:version:{}'
+AUTHOR_VERSION_KEY = 'posts:follow:author:{}'
+FOLLOW_PAGE_KEY = 'posts:follow:page:{}:{}'
+
+
+def post_count_key(scope, pk=None):
+    """Cache key of the number of posts in ``all``, ``group`` or ``author``."""
+    if pk is None:
+        return f'posts:count:{scope}'
+    return f'posts:count:{scope}:{pk}'
+
+
+def post_count_keys(post, group_id=None):
+    keys = [
+        post_count_key('all'),
+        post_count_key('author', post.author_id),
+    ]
+    for pk in {post.group_id, group_id} - {None}:
+        keys.append(post_count_key('group', pk))
+    return keys
+
+
+def get_post_count(key, posts):
+    """Return the cached size of ``posts``, counting it on a miss."""
+    count = cache.get(key)
+    if count is None:
+        count = posts.count()
+        cache.set(key, count, POST_COUNT_TIMEOUT)
+    return count
+
+
+def forget_post_counts(post, group_id=None):
+    """Drop the counters a post belongs to, including its former group."""
+    cache.delete_many(post_count_keys(post, group_id))
+
+
+def _fresh_version():
+    return int(time.time() * 1000)
+
+
+def get_pages_version():
+    """Return the current version of the cached feed pages."""
+    version = cache.get(PAGES_VERSION_KEY)
+    if version is None:
+        cache.add(PAGES_VERSION_KEY, _fresh_version(), None)
+        version = cache.get(PAGES_VERSION_KEY, _fresh_version())
+    return version
+
+
+def bump_pages_version():
+    """Invalidate every cached feed page at once."""
+    try:
+        cache.incr(PAGES_VERSION_KEY)
+    except ValueError:
+        cache.set(PAGES_VERSION_KEY, _fresh_version(), None)
+
+
+def _params(request):
+    return ':'.join(request.GET.get(name, '') for name in PAGE_PARAMS)
+
+
+def cache_feed_page(view):
+    """Cache the rendered page of a feed view for anonymous visitors.
+
+    Pages are keyed by view, group slug and page parameters under the
+    version from :func:`get_pages_version`, so a single increment hides
+    every stale page.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method != 'GET' or request.user.is_authenticated:
+            return view(request, *args, **kwargs)
+        key = (f'posts:page:{view.__name__}:{kwargs.get("slug", "")}:'
+               f'{_params(request)}')
+        version = get_pages_version()
+        content = cache.get(key, version=version)
+        if content is not None:
+            return HttpResponse(content)
+        response = view(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.content, PAGE_CACHE_TIMEOUT,
+                      version=version)
+        return response
+    return wrapper
+
+
+def follow_version_key(user_id):
+    """Cache key of the version of the follow feed of a user."""
+    return FOLLOW_VERSION_KEY.format(user_id)
+
+
+def author_version_key(author_id):
+    """Cache key of the version of the posts of a pull author."""
+    return AUTHOR_VERSION_KEY.format(author_id)
+
+
+def get_versions(keys):
+    """Return ``{key: version}``, creating the versions that are missing."""
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    for key in missing:
+        cache.add(key, uuid.uuid4().hex, None)
+    if missing:
+        versions.update(cache.get_many(missing))
+    return versions
+
+
+def bump_versions(keys):
+    """Replace the versions under ``keys`` in one round trip.
+
+    Versions are random rather than incremented: ``set_many`` needs no
+    current value, and a version never comes back after a bump.
+    """
+    if keys:
+        cache.set_many({key: uuid.uuid4().hex for key in keys}, None)
+
+
+def cache_follow_page(pull_author_ids):
+    """Cache the rendered ``follow_index`` of every user and page.
+
+    A page is stored with the version of the user's feed and those of the
+    followed pull authors, whose posts are not fanned out. A repeat visit
+    is one ``get_many`` of the page and the user's version, plus one for
+    the author versions if the user follows pull authors.
+    ``pull_author_ids(user)`` returns the followed pull authors.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET':
+                return view(request, *args, **kwargs)
+            user_key = follow_version_key(request.user.pk)
+            page_key = FOLLOW_PAGE_KEY.format(request.user.pk,
+                                              _params(request))
+            cached = cache.get_many([user_key, page_key])
+            if page_key in cached:
+                version, author_versions, content = cached[page_key]
+                if version == cached.get(user_key) and (
+                        not author_versions
+                        or cache.get_many(list(author_versions))
+                        == author_versions):
+                    return HttpResponse(content)
+            # Versions are read before rendering: a bump while the page
+            # renders leaves the stored page stale right away.
+            versions = get_versions([
+                user_key,
+                *(author_version_key(pk)
+                  for pk in pull_author_ids(request.user)),
+            ])
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(page_key,
+                          (versions.pop(user_key), versions,
+                           response.content),
+                          PAGE_CACHE_TIMEOUT)
+            return response
+        return wrapper
+    return decorator
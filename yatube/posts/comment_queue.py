@@ -0,0 +1,130 @@
+"""Single-writer queue for new comments.
+
+SQLite lets one connection write at a time, so a burst of comments on a
+popular post makes requests wait on each other's transactions and fail
+with "database is locked" once they have waited too long. With
+``COMMENT_WRITE_QUEUE`` the requests hand their comments to one writer
+thread per process instead. The writer takes everything queued since its
+last commit and inserts it in a single transaction, with one counter
+update per post.
+
+:func:`save_comment` waits for the commit of its comment, so the redirect
+that follows already shows it to its author.
+"""
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import Future, TimeoutError
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from . import counters
+from .caching import bump_pages_version
+from .models import Comment
+
+logger = logging.getLogger(__name__)
+
+WRITER_BATCH_SIZE = 500
+ACK_TIMEOUT = 5
+
+
+def write(comments):
+    """Insert ``comments`` and update their counters in one transaction."""
+    with transaction.atomic():
+        Comment.objects.bulk_create(comments)
+        counters.comments_created(comments)
+
+
+class CommentWriter:
+    """One thread that writes the comments queued by :meth:`submit`."""
+
+    def __init__(self, batch_size=WRITER_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.thread = None
+        self.pid = None
+
+    def submit(self, comment):
+        """Queue ``comment``; the future resolves once it is committed."""
+        self._start()
+        future = Future()
+        self.queue.put((comment, future))
+        return future
+
+    def _start(self):
+        with self.lock:
+            # A forked server worker inherits the object but not the thread.
+            if self.pid == os.getpid() and self.thread.is_alive():
+                return
+            self.queue = queue.Queue()
+            self.pid = os.getpid()
+            self.thread = threading.Thread(
+                target=self._run, name='comment-writer', daemon=True)
+            self.thread.start()
+
+    def _next_batch(self):
+        """Wait for a comment, then take whatever else is already queued."""
+        batch = [self.queue.get()]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            self._write(self._next_batch())
+
+    def _write(self, batch):
+        try:
+            write([comment for comment, _ in batch])
+            results = [(future, comment, None) for comment, future in batch]
+        except Exception:
+            # One bad comment, e.g. on a post deleted meanwhile, must not
+            # fail the others: retry them one by one.
+            connection.close()
+            results = [(future, comment, self._write_one(comment))
+                       for comment, future in batch]
+        # bulk_create sends no post_save: bump the pages before the
+        # authors are answered, so their next page shows the comments.
+        bump_pages_version()
+        for future, comment, error in results:
+            if error is None:
+                future.set_result(comment)
+            else:
+                future.set_exception(error)
+
+    def _write_one(self, comment):
+        """Write ``comment`` alone; return the error if it failed."""
+        try:
+            write([comment])
+        except Exception as error:
+            logger.exception('Comment by %s on post %s was not saved',
+                             comment.author_id, comment.post_id)
+            connection.close()
+            return error
+        return None
+
+
+writer = CommentWriter()
+
+
+def save_comment(comment):
+    """Save a new ``comment`` and count it; return it once committed.
+
+    With ``COMMENT_WRITE_QUEUE`` the comment goes through the writer. If it
+    is not committed within ``ACK_TIMEOUT`` seconds ``None`` is returned;
+    the comment stays queued and is written later.
+    """
+    if not settings.COMMENT_WRITE_QUEUE:
+        comment.save()
+        counters.comment_created(comment)
+        return comment
+    try:
+        return writer.submit(comment).result(timeout=ACK_TIMEOUT)
+    except TimeoutError:
+        return None
@@ -0,0 +1,133 @@
+"""Denormalized post, comment and follower counters.
+
+The write paths update the counters with ``F()`` expressions, so concurrent
+requests never overwrite each other; deletes are counted by the
+``post_delete`` receivers. Anything that bypasses them, such as
+``bulk_create`` or raw SQL, is repaired by ``manage.py reconcile_counters``.
+"""
+import collections
+
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Follow, Post, Profile, User
+
+RECONCILE_BATCH_SIZE = 500
+PROFILE_COUNTERS = ('post_count', 'follower_count', 'following_count')
+
+
+def _change(queryset, delta, *fields):
+    queryset.update(**{field: F(field) + delta for field in fields})
+
+
+def post_created(post):
+    _change(Profile.objects.filter(user_id=post.author_id), 1, 'post_count')
+
+
+def post_deleted(post):
+    # A drifted counter must not go below zero and fail the delete.
+    _change(Profile.objects.filter(user_id=post.author_id, post_count__gt=0),
+            -1, 'post_count')
+
+
+def comment_created(comment):
+    _change(Post.objects.filter(pk=comment.post_id), 1, 'comment_count')
+
+
+def comment_deleted(comment):
+    _change(Post.objects.filter(pk=comment.post_id, comment_count__gt=0),
+            -1, 'comment_count')
+
+
+def comments_created(comments):
+    """Count a batch of comments with one update per post."""
+    per_post = collections.Counter(comment.post_id for comment in comments)
+    for post_id, count in per_post.items():
+        _change(Post.objects.filter(pk=post_id), count, 'comment_count')
+
+
+def follow_changed(user_id, author_id, delta):
+    """Apply ``delta`` to both ends of a follow or an unfollow."""
+    _change(Profile.objects.filter(user_id=user_id), delta,
+            'following_count')
+    _change(Profile.objects.filter(user_id=author_id), delta,
+            'follower_count')
+
+
+def _count(queryset, field, outer='pk'):
+    return Coalesce(Subquery(
+        queryset.filter(**{field: OuterRef(outer)})
+        .order_by()
+        .values(field)
+        .annotate(count=Count('pk'))
+        .values('count')
+    ), 0)
+
+
+def _profile_counts():
+    return {
+        'post_count': _count(Post.objects.all(), 'author', 'user'),
+        'follower_count': _count(Follow.objects.all(), 'author', 'user'),
+        'following_count': _count(Follow.objects.all(), 'user', 'user'),
+    }
+
+
+def _post_counts():
+    return {'comment_count': _count(Comment.objects.all(), 'post')}
+
+
+def _recount(queryset, counts):
+    """Rewrite the drifted counters of ``queryset``; return their number."""
+    real = queryset.annotate(**{
+        f'real_{field}': count for field, count in counts.items()})
+    drifted = list(real.exclude(**{
+        field: F(f'real_{field}') for field in counts
+    }).values_list('pk', flat=True))
+    for start in range(0, len(drifted), RECONCILE_BATCH_SIZE):
+        queryset.model.objects.filter(
+            pk__in=drifted[start:start + RECONCILE_BATCH_SIZE]
+        ).update(**counts)
+    return len(drifted)
+
+
+def reconcile_profiles(profiles):
+    return _recount(profiles, _profile_counts())
+
+
+def reconcile_posts(posts):
+    return _recount(posts, _post_counts())
+
+
+def reconcile():
+    """Recount every counter in bulk.
+
+    Users without a profile get one first. Returns the number of profiles
+    and posts whose counters had drifted.
+    """
+    Profile.objects.bulk_create(
+        (Profile(user_id=pk) for pk in User.objects.filter(
+            profile__isnull=True).values_list('pk', flat=True).iterator()),
+        batch_size=RECONCILE_BATCH_SIZE,
+    )
+    return (reconcile_profiles(Profile.objects.all()),
+            reconcile_posts(Post.objects.all()))
+
+
+def get_profile(user, row=None):
+    """Return the profile of ``user``, creating a counted one if missing.
+
+    Since it may create the profile, ``user`` must be known to exist, not
+    just come from a cache. ``row`` may carry the counters as
+    ``profile__<field>`` values from a query that already joined the
+    profile, such as the profile state.
+    """
+    if row and row.get('profile__post_count') is not None:
+        return Profile(user=user, **{
+            field: row[f'profile__{field}'] for field in PROFILE_COUNTERS})
+    try:
+        return user.profile
+    except Profile.DoesNotExist:
+        profile, _ = Profile.objects.get_or_create(user=user)
+        reconcile_profiles(Profile.objects.filter(pk=profile.pk))
+        profile.refresh_from_db()
+        return profile
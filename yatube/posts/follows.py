@@ -0,0 +1,63 @@
+"""Follow and unfollow as single idempotent statements.
+
+A follow is one ``INSERT`` that ignores the conflict on ``unique_follow``
+and an unfollow is one ``DELETE`` by filter, so repeated or concurrent
+clicks neither fail nor fetch the row first. The row count of the
+statement tells whether anything changed, and only then are the counters,
+the timeline and the feed version touched.
+"""
+from django.db import connection, transaction
+
+from . import counters, timeline
+from .models import Follow, Profile, User
+
+
+def follow(user_id, author_id):
+    """Make ``user_id`` follow ``author_id``; return whether it is new."""
+    if user_id == author_id:
+        return False
+    ops = connection.ops
+    columns = ', '.join(ops.quote_name(Follow._meta.get_field(name).column)
+                        for name in ('user', 'author'))
+    # Selecting the author inserts nothing for a user deleted meanwhile,
+    # whom a stale lookup cache may still return.
+    author_table = User._meta.db_table
+    pk = ops.quote_name(User._meta.pk.column)
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'{ops.insert_statement(ignore_conflicts=True)} '
+                f'{ops.quote_name(Follow._meta.db_table)} ({columns}) '
+                f'SELECT %s, {pk} FROM {ops.quote_name(author_table)} '
+                f'WHERE {pk} = %s '
+                f'{ops.ignore_conflicts_suffix_sql(ignore_conflicts=True)}',
+                (user_id, author_id),
+            )
+            created = cursor.rowcount == 1
+        if created:
+            counters.follow_changed(user_id, author_id, 1)
+    if created:
+        timeline.backfill(user_id, author_id)
+        timeline.follows_changed(user_id)
+    return created
+
+
+def unfollow(user_id, author_id):
+    """Make ``user_id`` stop following ``author_id``; return whether it did."""
+    with transaction.atomic():
+        deleted, _ = Follow.objects.filter(
+            user_id=user_id, author_id=author_id).delete()
+        if deleted:
+            counters.follow_changed(user_id, author_id, -1)
+    if deleted:
+        timeline.remove(user_id, author_id)
+        timeline.follows_changed(user_id)
+    return bool(deleted)
+
+
+def follow_state(author_id, following):
+    """The follow button and the counters of a profile, for JSON."""
+    counts = Profile.objects.filter(user_id=author_id).values(
+        'follower_count', 'following_count').first()
+    return {'following': following,
+            **(counts or {'follower_count': 0, 'following_count': 0})}
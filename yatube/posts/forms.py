@@ -1,5 +1,7 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
 
+from . import uploads
 from .models import Post, Comment
 
 
@@ -8,6 +10,24 @@ class PostForm(forms.ModelForm):
         model = Post
         fields = ('text', 'group', 'image')
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # A truncated upload would only fail as a broken image; drop it and
+        # report the real reason in clean_image.
+        self.image_too_large = getattr(self.files.get('image'), 'too_large',
+                                       False)
+        if self.image_too_large:
+            self.files = self.files.copy()
+            del self.files['image']
+
+    def clean_image(self):
+        if self.image_too_large:
+            raise uploads.too_large_error()
+        image = self.cleaned_data['image']
+        if isinstance(image, UploadedFile):
+            return uploads.process_image(image)
+        return image
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,142 @@
+"""Validators for conditional GET of the feeds and the post page.
+
+Every page gets a state: a single-row query over the indexes on
+``updated_at`` and ``Comment.created``, plus the cached post counters so
+that a deleted post changes the state as well. The ``ETag`` is a hash of
+the state and the visitor; ``Last-Modified`` is when the state was first
+seen, so it moves on deletes too. A matching request is answered with
+``304 Not Modified`` before the view runs its queries or renders.
+
+The states of ``index``, ``group_posts`` and ``post_detail`` only change
+with posts, groups and comments, which bump the pages version, so they
+are cached under it. ``profile`` also shows follows and is checked on
+every request. Missing groups and users are answered by
+:mod:`posts.lookups` without a query.
+"""
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef, Subquery
+from django.utils import timezone
+from django.views.decorators.http import condition
+
+from . import lookups
+from .caching import (PAGE_CACHE_TIMEOUT, get_pages_version, get_post_count,
+                      post_count_key)
+from .models import Comment, Follow, Group, Post, User
+
+STATE_KEY = 'posts:fresh:state:{}'
+SEEN_KEY = 'posts:fresh:seen:{}'
+
+
+def _latest(queryset, field, outer='pk', ordering='-updated_at'):
+    return Subquery(queryset.filter(**{field: OuterRef(outer)})
+                    .order_by(ordering).values(ordering.lstrip('-'))[:1])
+
+
+def index_state(request):
+    latest = Post.objects.order_by('-updated_at').values_list(
+        'updated_at', flat=True).first()
+    return latest, get_post_count(post_count_key('all'), Post.objects.all())
+
+
+def group_state(request, slug):
+    if lookups.groups.get(slug) is None:
+        return None
+    group = Group.objects.filter(slug=slug).values_list(
+        'pk', 'title', 'description',
+        _latest(Post.objects.all(), 'group'),
+    ).first()
+    if group is None:
+        return None
+    return group, get_post_count(post_count_key('group', group[0]),
+                                 Post.objects.filter(group_id=group[0]))
+
+
+def post_state(request, post_id):
+    # Deletes decrement both counters (posts.signals), so a deleted older
+    # comment or post of the author changes the state too.
+    return Post.objects.filter(pk=post_id).values_list(
+        'updated_at', 'comment_count', 'author__profile__post_count',
+        _latest(Comment.objects.all(), 'post', ordering='-created'),
+    ).first()
+
+
+def profile_state(request, username):
+    """The profile row; the view reuses ``following`` from it."""
+    if lookups.users.get(username) is None:
+        return None
+    state = User.objects.filter(username=username).values(
+        'pk', 'first_name', 'last_name', 'profile__post_count',
+        'profile__follower_count', 'profile__following_count',
+        latest=_latest(Post.objects.all(), 'author'),
+    )
+    if request.user.is_authenticated:
+        state = state.annotate(following=Exists(Follow.objects.filter(
+            user=request.user, author=OuterRef('pk'))))
+    state = state.first()
+    if state is not None:
+        # The view counts the posts under the same key for its paginator.
+        state['post_count'] = get_post_count(
+            post_count_key('author', state['pk']),
+            Post.objects.filter(author_id=state['pk']))
+    return state
+
+
+def page_state(request):
+    """Return the state computed for this request, ``None`` if cached."""
+    return getattr(request, '_page_state', None)
+
+
+def _validators(scope, state):
+    """Return ``(etag, last_modified)`` of a page showing ``state``."""
+    etag = hashlib.md5(repr(state).encode()).hexdigest()
+    key = SEEN_KEY.format(scope)
+    seen = cache.get(key)
+    if seen is not None and seen[0] == etag:
+        return seen
+    seen = (etag, timezone.now())
+    cache.set(key, seen, None)
+    return seen
+
+
+def _page_validators(request, get_state, shared, kwargs):
+    scope = ':'.join([get_state.__name__, *map(str, kwargs.values())])
+    if not shared:
+        scope = f'{scope}:{request.user.pk}'
+    key = STATE_KEY.format(scope)
+    if shared:
+        version = get_pages_version()
+        result = cache.get(key, version=version)
+        if result is not None:
+            return result
+    state = request._page_state = get_state(request, **kwargs)
+    result = (None, None) if state is None else _validators(scope, state)
+    if shared:
+        cache.set(key, result, PAGE_CACHE_TIMEOUT, version=version)
+    return result
+
+
+def conditional(get_state, shared=True):
+    """Answer conditional GETs of a view from ``get_state(request, ...)``.
+
+    With ``shared`` the validators are cached under the pages version;
+    otherwise ``get_state`` runs on every request.
+    """
+    def validators(request, **kwargs):
+        if not hasattr(request, '_validators'):
+            request._validators = _page_validators(request, get_state,
+                                                   shared, kwargs)
+        return request._validators
+
+    def etag(request, **kwargs):
+        etag = validators(request, **kwargs)[0]
+        if etag is None:
+            return None
+        # Pages differ between visitors: the header, the follow button.
+        return f'{request.user.pk or 0}-{etag}'
+
+    def last_modified(request, **kwargs):
+        return validators(request, **kwargs)[1]
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
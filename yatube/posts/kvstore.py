@@ -0,0 +1,32 @@
+from sorl.thumbnail.conf import settings
+from sorl.thumbnail.images import deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import EMPTY_VALUE
+from sorl.thumbnail.kvstores.cached_db_kvstore import KVStore as BaseKVStore
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+
+class KVStore(BaseKVStore):
+    """sorl-thumbnail store that can look up many images at once.
+
+    ``get_many`` costs one ``cache.get_many`` plus, for keys the cache has
+    never seen, one database query, instead of a round trip per image.
+    """
+
+    def get_many(self, image_files):
+        """Return ``{image_file.key: stored ImageFile or None}``."""
+        keys = {add_prefix(image_file.key): image_file.key
+                for image_file in image_files}
+        values = self.cache.get_many(keys)
+        missing = set(keys) - set(values)
+        if missing:
+            stored = dict(KVStoreModel.objects.filter(
+                key__in=missing).values_list('key', 'value'))
+            fetched = {key: stored.get(key, EMPTY_VALUE) for key in missing}
+            self.cache.set_many(fetched, settings.THUMBNAIL_CACHE_TIMEOUT)
+            values.update(fetched)
+        return {
+            keys[key]: (None if value == EMPTY_VALUE
+                        else deserialize_image_file(value))
+            for key, value in values.items()
+        }
@@ -0,0 +1,96 @@
+"""In-process cache of groups by slug and users by username.
+
+``group_posts``, ``profile`` and the follow views start by resolving a URL
+argument to a row that almost never changes. :class:`LookupCache` keeps
+the rows of the last lookups in the worker, bounded in size and age, and
+remembers misses as well, so probes for missing slugs stop at the cache.
+
+Saving or deleting a group or a user drops its entries through signals.
+The cache lives in one process, so other workers see a change when their
+entries expire: ``LOOKUP_TIMEOUT`` bounds how stale a row can be.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.http import Http404
+
+from .models import Group, User
+
+LOOKUP_CACHE_SIZE = 1024
+LOOKUP_TIMEOUT = 60
+MISSING = object()
+
+
+class LookupCache:
+    """A read-through LRU cache of ``model`` rows by a unique ``field``.
+
+    Rows are kept as field values and every hit returns a new instance, so
+    what a request caches on its instance does not leak into the next one.
+    """
+
+    def __init__(self, model, field, size=LOOKUP_CACHE_SIZE,
+                 timeout=LOOKUP_TIMEOUT):
+        self.model = model
+        self.field = field
+        self.size = size
+        self.timeout = timeout
+        self.names = [f.attname for f in model._meta.concrete_fields]
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _cached(self, value):
+        with self.lock:
+            entry = self.entries.get(value)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self.entries[value]
+                return None
+            self.entries.move_to_end(value)
+            return entry[1]
+
+    def _load(self, value):
+        row = self.model._default_manager.filter(
+            **{self.field: value}).values_list(*self.names).first()
+        with self.lock:
+            self.entries[value] = (time.monotonic() + self.timeout,
+                                   MISSING if row is None else row)
+            self.entries.move_to_end(value)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+        return row
+
+    def get(self, value):
+        """Return the row with ``field`` equal to ``value`` or ``None``."""
+        row = self._cached(value)
+        if row is None:
+            row = self._load(value)
+        if row is None or row is MISSING:
+            return None
+        return self.model.from_db(None, self.names, row)
+
+    def get_or_404(self, value):
+        instance = self.get(value)
+        if instance is None:
+            raise Http404(
+                f'No {self.model._meta.object_name} matches the given query.')
+        return instance
+
+    def forget(self, instance):
+        """Drop the entries of ``instance`` under its old and new values."""
+        pk_index = self.names.index(self.model._meta.pk.attname)
+        with self.lock:
+            stale = [value for value, (_, row) in self.entries.items()
+                     if row is not MISSING and row[pk_index] == instance.pk]
+            stale.append(getattr(instance, self.field))
+            for value in stale:
+                self.entries.pop(value, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+groups = LookupCache(Group, 'slug')
+users = LookupCache(User, 'username')
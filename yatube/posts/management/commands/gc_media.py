@@ -0,0 +1,29 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+
+from posts import media
+
+
+class Command(BaseCommand):
+    help = ('Delete uploaded post images that no post refers to any more, '
+            'together with their thumbnails.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-age', type=float, default=1,
+            help='Keep files younger than this many hours.')
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only list the files that would be deleted.')
+
+    def handle(self, *args, **options):
+        deleted = media.collect(
+            min_age=datetime.timedelta(hours=options['min_age']),
+            dry_run=options['dry_run'],
+        )
+        for name in deleted:
+            self.stdout.write(name)
+        verb = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {len(deleted)} files.'))
@@ -0,0 +1,37 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+
+
+class Command(BaseCommand):
+    help = ('Build the thumbnails of every post image in parallel, '
+            'resuming an interrupted run from its checkpoint.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Processes that resize images.')
+        parser.add_argument(
+            '--checkpoint', default='rebuild_thumbnails.checkpoint',
+            help='File that keeps the last finished post id.')
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Ignore the checkpoint and start from the first post.')
+
+    def handle(self, *args, **options):
+        checkpoint = options['checkpoint']
+        if options['restart'] and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+
+        def report(done, failed, seconds):
+            self.stdout.write(
+                f'{done} images, {failed} failed, '
+                f'{done / seconds if seconds else 0:.1f} images/s')
+
+        done, failed = thumbnails.rebuild(
+            workers=options['workers'], checkpoint=checkpoint,
+            report=report)
+        self.stdout.write(self.style.SUCCESS(
+            f'Thumbnails built for {done} images, {failed} failed.'))
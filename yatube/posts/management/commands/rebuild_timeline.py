@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import timeline
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = ('Rebuild the materialized follow timelines from Follow. '
+            'Run it after bulk imports or after changing '
+            'TIMELINE_FANOUT_LIMIT.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', action='append', dest='usernames', default=[],
+            help='Only rebuild the timeline of this user; may be repeated.')
+
+    def handle(self, *args, **options):
+        user_ids = None
+        if options['usernames']:
+            users = dict(User.objects.filter(
+                username__in=options['usernames']
+            ).values_list('username', 'pk'))
+            missing = set(options['usernames']) - set(users)
+            if missing:
+                raise CommandError(
+                    f'Unknown users: {", ".join(sorted(missing))}')
+            user_ids = list(users.values())
+        rows = timeline.rebuild(user_ids)
+        self.stdout.write(self.style.SUCCESS(
+            f'Timelines rebuilt: {rows} rows.'))
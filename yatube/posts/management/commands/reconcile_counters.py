@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts import counters
+
+
+class Command(BaseCommand):
+    help = ('Recount the denormalized post, comment and follower counters '
+            'and repair the ones that drifted.')
+
+    def handle(self, *args, **options):
+        profiles, posts = counters.reconcile()
+        self.stdout.write(self.style.SUCCESS(
+            f'Counters repaired: {profiles} profiles, {posts} posts.'))
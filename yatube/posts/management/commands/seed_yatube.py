@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.seeding import BATCH_SIZE, Seeder
+
+
+class Command(BaseCommand):
+    help = ('Fill the database with synthetic users, groups, posts, '
+            'follows and comments for load testing. Much faster than '
+            'loaddata.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--posts', type=int, default=1000)
+        parser.add_argument('--follows', type=int, default=1000)
+        parser.add_argument('--comments', type=int, default=1000)
+        parser.add_argument(
+            '--groups', type=int,
+            help='Number of groups; one per 1000 posts by default.')
+        parser.add_argument(
+            '--images', type=int, default=10,
+            help='Size of the placeholder image pool shared by the posts.')
+        parser.add_argument(
+            '--image-share', type=float, default=0.25,
+            help='Share of posts with an image.')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            '--seed', type=int, help='Seed of the random generator.')
+
+    def report(self, table, rows, seconds):
+        self.stdout.write(
+            f'{table}: {rows} rows in {seconds:.2f} s '
+            f'({rows / max(seconds, 1e-9):.0f} rows/s)')
+
+    def handle(self, *args, **options):
+        if options['users'] < 2 and options['follows']:
+            raise CommandError('Follows need at least two users.')
+        if options['users'] < 1 and (options['posts']
+                                     or options['comments']):
+            raise CommandError('Posts and comments need at least one user.')
+        if options['posts'] < 1 and options['comments']:
+            raise CommandError('Comments need at least one post.')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive.')
+        Seeder(
+            users=options['users'],
+            posts=options['posts'],
+            follows=options['follows'],
+            comments=options['comments'],
+            groups=options['groups'],
+            images=options['images'],
+            image_share=options['image_share'],
+            batch_size=options['batch_size'],
+            seed=options['seed'],
+            report=self.report,
+        ).run()
+        self.stdout.write(self.style.SUCCESS('Database seeded.'))
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+
+
+class Command(BaseCommand):
+    help = ('Build the queued post thumbnails so that pages never resize '
+            'images while rendering.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Exit when the queue is empty instead of polling it.')
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Queue every post with an image first.')
+        parser.add_argument(
+            '--interval', type=float, default=1,
+            help='Seconds to wait when the queue is empty.')
+        parser.add_argument('--batch-size', type=int,
+                            default=thumbnails.WORKER_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        if options['all']:
+            queued = thumbnails.enqueue_all()
+            self.stdout.write(f'Queued {queued} images.')
+        done = 0
+        while True:
+            taken = thumbnails.process_tasks(options['batch_size'])
+            done += taken
+            if taken:
+                continue
+            if options['once']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Thumbnails built for {done} images.'))
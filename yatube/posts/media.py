@@ -0,0 +1,77 @@
+"""Garbage collection of uploaded post images.
+
+Content-addressed files are shared by every post with the same image and
+are never deleted together with a post. ``collect`` counts the references
+to every stored file and deletes the ones nobody refers to, together with
+their thumbnails.
+"""
+import datetime
+import os
+
+from django.db.models import Count
+from django.utils import timezone
+from sorl.thumbnail import delete as delete_thumbnails
+
+from .models import Post, ThumbnailTask
+from .thumbnails import source_file
+
+GC_BATCH_SIZE = 500
+
+
+def image_storage():
+    return Post._meta.get_field('image').storage
+
+
+def walk(storage, path):
+    """Yield the names of all files below ``path``."""
+    directories, files = storage.listdir(path)
+    for name in files:
+        yield os.path.join(path, name)
+    for directory in directories:
+        yield from walk(storage, os.path.join(path, directory))
+
+
+def reference_counts(names):
+    """Return ``{name: number of posts and pending tasks using it}``."""
+    counts = dict.fromkeys(names, 0)
+    for model, field in ((Post, 'image'), (ThumbnailTask, 'image')):
+        for name, references in (
+                model.objects.filter(**{f'{field}__in': names})
+                .values_list(field).annotate(Count('pk')).order_by()):
+            counts[name] += references
+    return counts
+
+
+def orphans(min_age):
+    """Yield unreferenced files older than ``min_age``.
+
+    The age check spares files whose post is being saved right now.
+    """
+    storage = image_storage()
+    upload_to = Post._meta.get_field('image').upload_to
+    if not storage.exists(upload_to):
+        return
+    born_before = timezone.now() - min_age
+    batch = []
+    for name in walk(storage, upload_to.rstrip('/')):
+        batch.append(name)
+        if len(batch) == GC_BATCH_SIZE:
+            yield from _orphans(storage, batch, born_before)
+            batch = []
+    yield from _orphans(storage, batch, born_before)
+
+
+def _orphans(storage, names, born_before):
+    for name, references in reference_counts(names).items():
+        if not references and storage.get_modified_time(name) < born_before:
+            yield name
+
+
+def collect(min_age=datetime.timedelta(hours=1), dry_run=False):
+    """Delete orphaned images and their thumbnails; return their names."""
+    deleted = []
+    for name in orphans(min_age):
+        if not dry_run:
+            delete_thumbnails(source_file(name))
+        deleted.append(name)
+    return deleted
@@ -0,0 +1,64 @@
+# Generated by Django 2.2.16 on 2026-10-17 04:25
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_timelines(apps, schema_editor):
+    """Copy the recent posts of every followed author, as a follow does."""
+    Follow = apps.get_model('posts', 'Follow')
+    Post = apps.get_model('posts', 'Post')
+    Timeline = apps.get_model('posts', 'Timeline')
+    connection = schema_editor.connection
+    ops = connection.ops
+    columns = ', '.join(ops.quote_name(Timeline._meta.get_field(name).column)
+                        for name in ('user', 'post', 'pub_date'))
+    follows = Follow.objects.values_list('user_id', 'author_id').distinct()
+    with connection.cursor() as cursor:
+        for user_id, author_id in follows.iterator():
+            posts = (
+                Post.objects.filter(author_id=author_id)
+                .order_by('-pub_date', '-id')
+                .values('pk', 'pub_date')[:settings.TIMELINE_BACKFILL_LIMIT]
+            )
+            select, params = posts.query.sql_with_params()
+            cursor.execute(
+                f'{ops.insert_statement(ignore_conflicts=True)} '
+                f'{ops.quote_name(Timeline._meta.db_table)} ({columns}) '
+                f'SELECT %s, posts.* FROM ({select}) posts '
+                f'{ops.ignore_conflicts_suffix_sql(ignore_conflicts=True)}',
+                (user_id, *params),
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0002_post_pub_date_id_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Timeline',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pub_date', models.DateTimeField()),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline', to='posts.Post')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-pub_date'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='timeline',
+            index=models.Index(fields=['user', '-pub_date', '-id'], name='timeline_user_pub_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='timeline',
+            constraint=models.UniqueConstraint(fields=('user', 'post'), name='unique_timeline_post'),
+        ),
+        migrations.RunPython(fill_timelines, migrations.RunPython.noop),
+    ]
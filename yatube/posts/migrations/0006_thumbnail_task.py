@@ -0,0 +1,26 @@
+# Generated by Django 2.2.16 on 2026-10-17 04:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0005_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ThumbnailTask',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('image', models.CharField(max_length=100, verbose_name='image')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='thumbnail_tasks', to='posts.Post')),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -1,6 +1,8 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from .storage import ContentHashStorage
+
 User = get_user_model()
 
 SYMBOLS_LIMIT = 15
@@ -19,6 +21,7 @@ class Group(models.Model):
 class Post(models.Model):
     text = models.TextField(verbose_name='content', help_text='just text')
     pub_date = models.DateTimeField(verbose_name='date', auto_now_add=True)
+    updated_at = models.DateTimeField(verbose_name='updated', auto_now=True)
     author = models.ForeignKey(User,
                                verbose_name='author',
                                on_delete=models.CASCADE,
@@ -33,14 +36,32 @@ class Post(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
-        blank=True
+        storage=ContentHashStorage(),
+        blank=True,
+        db_index=True
     )
+    comment_count = models.PositiveIntegerField(verbose_name='comments',
+                                                default=0)
 
     def __str__(self):
         return self.text[:SYMBOLS_LIMIT]
 
     class Meta:
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(fields=['-pub_date', '-id'],
+                         name='post_pub_date_id_idx'),
+            models.Index(fields=['author', '-pub_date', '-id'],
+                         name='post_author_pub_date_idx'),
+            models.Index(fields=['group', '-pub_date', '-id'],
+                         name='post_group_pub_date_idx'),
+            models.Index(fields=['-updated_at'],
+                         name='post_updated_at_idx'),
+            models.Index(fields=['author', '-updated_at'],
+                         name='post_author_updated_at_idx'),
+            models.Index(fields=['group', '-updated_at'],
+                         name='post_group_updated_at_idx'),
+        ]
 
 
 class Comment(models.Model):
@@ -56,6 +77,10 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ['created']
+        indexes = [
+            models.Index(fields=['post', 'created'],
+                         name='comment_post_created_idx'),
+        ]
 
     def __str__(self):
         return self.text[TEXT_LIMIT]
@@ -68,3 +93,59 @@ class Follow(models.Model):
     author = models.ForeignKey(User,
                                on_delete=models.CASCADE,
                                related_name='following')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'author'],
+                                    name='unique_follow'),
+        ]
+
+
+class Profile(models.Model):
+    user = models.OneToOneField(User,
+                                on_delete=models.CASCADE,
+                                related_name='profile')
+    post_count = models.PositiveIntegerField(verbose_name='posts',
+                                             default=0)
+    follower_count = models.PositiveIntegerField(verbose_name='followers',
+                                                 default=0)
+    following_count = models.PositiveIntegerField(verbose_name='following',
+                                                  default=0)
+
+    def __str__(self):
+        return self.user.username
+
+
+class Timeline(models.Model):
+    user = models.ForeignKey(User,
+                             on_delete=models.CASCADE,
+                             related_name='timeline')
+    post = models.ForeignKey(Post,
+                             on_delete=models.CASCADE,
+                             related_name='timeline')
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-pub_date']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'post'],
+                                    name='unique_timeline_post'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-pub_date', '-id'],
+                         name='timeline_user_pub_date_idx'),
+        ]
+
+
+class ThumbnailTask(models.Model):
+    post = models.ForeignKey(Post,
+                             on_delete=models.CASCADE,
+                             related_name='thumbnail_tasks')
+    image = models.CharField(verbose_name='image', max_length=100)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return self.image
@@ -0,0 +1,222 @@
+import datetime
+
+from django.core.paginator import (EmptyPage, Page, PageNotAnInteger,
+                                   Paginator)
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+
+from .caching import get_post_count
+
+FEED_ORDERING = ('-pub_date', '-id')
+CURSOR_FIELDS = ('pub_date', 'id')
+PAGE_WINDOW_ON_EACH_SIDE = 2
+PAGE_WINDOW_ON_ENDS = 1
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def encode_cursor(post, fields=CURSOR_FIELDS):
+    """Return the ``<pub_date,id>`` cursor of a post.
+
+    ``pub_date`` is written as integer microseconds since the epoch so the
+    cursor survives the round trip through a query string unchanged.
+    """
+    date_field, pk_field = fields
+    delta = getattr(post, date_field) - EPOCH
+    micros = (delta.days * 86400 + delta.seconds) * 10 ** 6
+    return f'{micros + delta.microseconds},{getattr(post, pk_field)}'
+
+
+def decode_cursor(cursor):
+    """Return ``(pub_date, id)`` or ``None`` for a malformed cursor."""
+    try:
+        micros, pk = (int(part) for part in cursor.split(','))
+        pub_date = EPOCH + datetime.timedelta(microseconds=micros)
+    except (AttributeError, TypeError, ValueError, OverflowError):
+        return None
+    return pub_date, pk
+
+
+class CursorPage(Page):
+    """Page fetched by seeking on ``(pub_date, id)`` instead of OFFSET.
+
+    There is no page number in cursor mode, so only the navigation that
+    ``includes/paginator.html`` needs is provided: ``has_next``,
+    ``has_previous`` and the cursors of the neighbouring pages.
+    """
+
+    is_cursor = True
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        super().__init__(object_list, None, paginator)
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return '<Cursor page>'
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    @property
+    def next_cursor(self):
+        if self._has_next and self.object_list:
+            return encode_cursor(self.object_list[-1],
+                                 self.paginator.cursor_fields)
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self._has_previous and self.object_list:
+            return encode_cursor(self.object_list[0],
+                                 self.paginator.cursor_fields)
+        return None
+
+
+class FeedPaginator(Paginator):
+    """Paginator for post feeds.
+
+    ``?page=N`` keeps working as usual, ``?after=`` and ``?before=`` seek
+    on ``cursor_fields`` so that a deep page costs as much as the first one.
+
+    The total comes from the cached counter ``count_key`` when it is given.
+    With ``exact_count=False`` no COUNT query runs at all: a page fetches one
+    extra row to learn whether a next page exists, and ``count`` is only a
+    lower bound.
+    """
+
+    def __init__(self, object_list, per_page,
+                 cursor_fields=CURSOR_FIELDS, count_key=None,
+                 exact_count=True, **kwargs):
+        date_field, pk_field = cursor_fields
+        object_list = object_list.order_by(f'-{date_field}', f'-{pk_field}')
+        super().__init__(object_list, per_page, **kwargs)
+        self.cursor_fields = cursor_fields
+        self.count_key = count_key
+        self.exact_count = exact_count
+
+    @cached_property
+    def count(self):
+        if self.count_key is not None:
+            return get_post_count(self.count_key, self.object_list)
+        return super().count
+
+    def validate_number(self, number):
+        if self.exact_count:
+            return super().validate_number(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(_('That page number is not an integer'))
+        if number < 1:
+            raise EmptyPage(_('That page number is less than 1'))
+        return number
+
+    def get_page(self, number):
+        if self.exact_count:
+            return super().get_page(number)
+        try:
+            return self.page(number)
+        except (PageNotAnInteger, EmptyPage):
+            return self.page(1)
+
+    def page(self, number):
+        if self.exact_count:
+            page = super().page(number)
+        else:
+            number = self.validate_number(number)
+            bottom = (number - 1) * self.per_page
+            posts = list(self.object_list[bottom:bottom + self.per_page + 1])
+            if not posts and number > 1:
+                raise EmptyPage(_('That page contains no results'))
+            self.__dict__.pop('num_pages', None)
+            self.count = bottom + len(posts)
+            page = self._get_page(posts[:self.per_page], number, self)
+        page.page_window = self.get_page_window(page.number)
+        return page
+
+    def get_page_window(self, number):
+        """Return the page numbers around ``number`` with ``None`` for gaps.
+
+        The template renders a fixed number of links however many pages
+        there are.
+        """
+        on_each_side = PAGE_WINDOW_ON_EACH_SIDE
+        on_ends = PAGE_WINDOW_ON_ENDS
+        num_pages = self.num_pages
+        if num_pages <= (on_each_side + on_ends) * 2 + 1:
+            return list(range(1, num_pages + 1))
+        window = []
+        if number > 1 + on_each_side + on_ends + 1:
+            window.extend(range(1, on_ends + 1))
+            window.append(None)
+            window.extend(range(number - on_each_side, number + 1))
+        else:
+            window.extend(range(1, number + 1))
+        if number < num_pages - on_each_side - on_ends - 1:
+            window.extend(range(number + 1, number + on_each_side + 1))
+            window.append(None)
+            window.extend(range(num_pages - on_ends + 1, num_pages + 1))
+        else:
+            window.extend(range(number + 1, num_pages + 1))
+        return window
+
+    def _seek(self, cursor, newer):
+        date_field, pk_field = self.cursor_fields
+        pub_date, pk = cursor
+        op = 'gt' if newer else 'lt'
+        # The redundant ``gte``/``lte`` bound lets the database start an
+        # index range scan at the cursor instead of filtering a full scan.
+        posts = self.object_list.filter(
+            Q(**{f'{date_field}__{op}e': pub_date}),
+            Q(**{f'{date_field}__{op}': pub_date})
+            | Q(**{f'{pk_field}__{op}': pk}),
+        )
+        if newer:
+            posts = posts.reverse()
+        return list(posts[:self.per_page + 1])
+
+    def get_cursor_page(self, after=None, before=None):
+        """Return the page right after or right before a cursor.
+
+        A malformed cursor falls back to the first page, the same way
+        :meth:`get_page` treats a page number that is not an integer.
+        """
+        if after is not None:
+            cursor = decode_cursor(after)
+            if cursor is not None:
+                posts = self._seek(cursor, newer=False)
+                return CursorPage(posts[:self.per_page], self,
+                                  has_next=len(posts) > self.per_page,
+                                  has_previous=True)
+        elif before is not None:
+            cursor = decode_cursor(before)
+            if cursor is not None:
+                posts = self._seek(cursor, newer=True)
+                has_previous = len(posts) > self.per_page
+                posts = posts[:self.per_page][::-1]
+                if posts:
+                    return CursorPage(posts, self, has_next=True,
+                                      has_previous=has_previous)
+        posts = list(self.object_list[:self.per_page + 1])
+        return CursorPage(posts[:self.per_page], self,
+                          has_next=len(posts) > self.per_page,
+                          has_previous=False)
+
+
+def paginate(request, posts, per_page, **kwargs):
+    """Return the ``page_obj`` for a feed view.
+
+    The cursor parameters win over ``?page=``; ``kwargs`` are passed on to
+    :class:`FeedPaginator`.
+    """
+    paginator = FeedPaginator(posts, per_page, **kwargs)
+    after = request.GET.get('after')
+    before = request.GET.get('before')
+    if after or before:
+        return paginator.get_cursor_page(after=after, before=before)
+    return paginator.get_page(request.GET.get('page'))
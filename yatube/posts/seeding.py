@@ -0,0 +1,196 @@
+"""Synthetic data for load testing and benchmarks.
+
+Rows are generated lazily and written with ``bulk_create`` batch by batch,
+so millions of posts never sit in memory at once. Authors are picked with
+Zipf-distributed weights: a handful of users write most posts and collect
+most followers, like on a real site.
+
+``bulk_create`` sends no signals, so once everything is written the
+counters and timelines are rebuilt and the cache is cleared.
+"""
+import io
+import itertools
+import random
+import time
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import transaction
+
+from . import counters, timeline
+from .models import Comment, Follow, Group, Post, Timeline, User
+
+BATCH_SIZE = 500
+ZIPF_EXPONENT = 1.1
+TEXT_POOL_SIZE = 1000
+IMAGE_SIZE = (960, 540)
+IMAGE_DIR = 'posts/seed'
+GROUPS_PER_POSTS = 1000
+
+
+def zipf_weights(count, exponent=ZIPF_EXPONENT):
+    """Return cumulative weights of ranks ``1..count`` for ``choices``."""
+    return list(itertools.accumulate(
+        1 / rank ** exponent for rank in range(1, count + 1)))
+
+
+def placeholder_images(count):
+    """Save ``count`` placeholder images once and return their names.
+
+    Posts share this small pool instead of getting a file each.
+    """
+    from PIL import Image
+
+    # The storage of Post.image, so the names resolve when the posts are read.
+    storage = Post._meta.get_field('image').storage
+    names = []
+    for i in range(count):
+        name = f'{IMAGE_DIR}/placeholder_{i}.jpg'
+        if not storage.exists(name):
+            hue = i * 360 // count
+            # Noise keeps the files about as large as photos after JPEG.
+            image = Image.blend(
+                Image.new('RGB', IMAGE_SIZE, f'hsl({hue}, 60%, 60%)'),
+                Image.effect_noise(IMAGE_SIZE, 64).convert('RGB'),
+                0.3,
+            )
+            buffer = io.BytesIO()
+            image.save(buffer, 'JPEG', quality=80)
+            name = storage.save(name, ContentFile(buffer.getvalue()))
+        names.append(name)
+    return names
+
+
+def _batches(rows, batch_size):
+    rows = iter(rows)
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+class Seeder:
+    """Fill the posts tables with ``Seeder(...).run()``.
+
+    ``report`` is called with ``(table, rows, seconds)`` after every table.
+    """
+
+    def __init__(self, users, posts, follows, comments, groups=None,
+                 images=10, image_share=0.25, batch_size=BATCH_SIZE,
+                 seed=None, report=None):
+        self.counts = {
+            'users': users,
+            'groups': (max(1, posts // GROUPS_PER_POSTS)
+                       if groups is None else groups),
+            'posts': posts,
+            'follows': follows,
+            'comments': comments,
+        }
+        self.images = images
+        self.image_share = image_share
+        self.batch_size = batch_size
+        self.random = random.Random(seed)
+        self.report = report or (lambda table, rows, seconds: None)
+
+    def run(self):
+        from faker import Faker
+        from mixer.backend.django import Mixer
+
+        self.mixer = Mixer(commit=False)
+        fake = Faker('ru_RU')
+        fake.seed_instance(self.random.random())
+        self.texts = [fake.text(200) for _ in range(TEXT_POOL_SIZE)]
+
+        user_ids = self._insert(User, self._users())
+        group_ids = self._insert(Group, self._groups())
+        post_ids = self._insert(Post, self._posts(user_ids, group_ids))
+        self._insert(Follow, self._follows(user_ids))
+        self._insert(Comment, self._comments(user_ids, post_ids))
+
+        start = time.perf_counter()
+        counters.reconcile()
+        rows = timeline.rebuild()
+        self.report(Timeline._meta.db_table, rows,
+                    time.perf_counter() - start)
+        cache.clear()
+
+    def _insert(self, model, rows):
+        """Insert ``rows`` and return the primary keys of the new rows."""
+        start = time.perf_counter()
+        last_pk = model.objects.order_by('-pk').values_list(
+            'pk', flat=True).first() or 0
+        with transaction.atomic():
+            for batch in _batches(rows, self.batch_size):
+                model.objects.bulk_create(batch)
+        pks = list(model.objects.filter(pk__gt=last_pk).values_list(
+            'pk', flat=True))
+        self.report(model._meta.db_table, len(pks),
+                    time.perf_counter() - start)
+        return pks
+
+    def _names(self, model, count):
+        """Unique names that do not clash with the rows of earlier runs."""
+        start = model.objects.order_by('-pk').values_list(
+            'pk', flat=True).first() or 0
+        return range(start + 1, start + count + 1)
+
+    def _users(self):
+        names = self._names(User, self.counts['users'])
+        for batch in _batches(names, self.batch_size):
+            yield from self.mixer.cycle(len(batch)).blend(
+                User,
+                username=(f'seed_{i}' for i in batch),
+                password='!',
+            )
+
+    def _groups(self):
+        return self.mixer.cycle(self.counts['groups']).blend(
+            Group,
+            slug=(f'seed-{i}'
+                  for i in self._names(Group, self.counts['groups'])),
+        )
+
+    def _posts(self, user_ids, group_ids):
+        weights = zipf_weights(len(user_ids))
+        groups = group_ids + [None] * len(group_ids)
+        images = placeholder_images(self.images) if self.images else []
+        texts = itertools.cycle(self.texts)
+        for _ in range(self.counts['posts']):
+            image = ''
+            if images and self.random.random() < self.image_share:
+                image = self.random.choice(images)
+            yield Post(
+                text=next(texts),
+                author_id=self.random.choices(
+                    user_ids, cum_weights=weights)[0],
+                group_id=self.random.choice(groups),
+                image=image,
+            )
+
+    def _follows(self, user_ids):
+        """Follow popular authors more often, without duplicate pairs."""
+        weights = zipf_weights(len(user_ids))
+        follows = min(self.counts['follows'],
+                      len(user_ids) * (len(user_ids) - 1))
+        pairs = set()
+        while len(pairs) < follows:
+            user_id = self.random.choice(user_ids)
+            author_id = self.random.choices(user_ids, cum_weights=weights)[0]
+            if user_id == author_id or (user_id, author_id) in pairs:
+                # Fall back to a uniform pick once the popular authors of
+                # this user are taken.
+                author_id = self.random.choice(user_ids)
+                if user_id == author_id or (user_id, author_id) in pairs:
+                    continue
+            pairs.add((user_id, author_id))
+            yield Follow(user_id=user_id, author_id=author_id)
+
+    def _comments(self, user_ids, post_ids):
+        texts = itertools.cycle(self.texts)
+        for _ in range(self.counts['comments']):
+            yield Comment(
+                text=next(texts),
+                author_id=self.random.choice(user_ids),
+                post_id=self.random.choice(post_ids),
+            )
@@ -0,0 +1,101 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import counters, lookups, timeline
+from .caching import bump_pages_version, forget_post_counts
+from .models import Comment, Group, Post, Profile, User
+
+# Fields shown on the cached post cards, by model, and the Post field that
+# points to the model.
+CARD_FIELDS = {
+    User: ('author', ('username', 'first_name', 'last_name')),
+    Group: ('group', ('slug',)),
+}
+
+
+@receiver(pre_save, sender=Post)
+def remember_group(sender, instance, **kwargs):
+    instance._saved_group_id = None
+    if instance.pk is not None:
+        instance._saved_group_id = Post.objects.filter(
+            pk=instance.pk).values_list('group_id', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    group_id = getattr(instance, '_saved_group_id', None)
+    if created or group_id != instance.group_id:
+        forget_post_counts(instance, group_id)
+    if created:
+        timeline.fan_out(instance)
+    else:
+        timeline.post_changed(instance.author_id)
+
+
+@receiver(pre_save, sender=User)
+@receiver(pre_save, sender=Group)
+def remember_card_fields(sender, instance, update_fields=None, **kwargs):
+    instance._saved_card_fields = None
+    fields = CARD_FIELDS[sender][1]
+    # Logins save only last_login; skip the query for them.
+    if instance.pk is None or (
+            update_fields is not None and not set(fields) & update_fields):
+        return
+    instance._saved_card_fields = sender.objects.filter(
+        pk=instance.pk).values_list(*fields).first()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Group)
+def card_fields_changed(sender, instance, **kwargs):
+    """Renew the cards of the posts of a renamed author or group."""
+    saved = getattr(instance, '_saved_card_fields', None)
+    relation, fields = CARD_FIELDS[sender]
+    if saved is None or saved == tuple(
+            getattr(instance, name) for name in fields):
+        return
+    # Cards are cached under updated_at, which update() moves quietly.
+    Post.objects.filter(**{relation: instance}).update(
+        updated_at=timezone.now())
+    bump_pages_version()
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    counters.post_deleted(instance)
+    forget_post_counts(instance)
+    timeline.post_changed(instance.author_id)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    counters.comment_deleted(instance)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def feed_changed(sender, **kwargs):
+    bump_pages_version()
+
+
+@receiver(post_save, sender=User)
+def user_created(sender, instance, created, **kwargs):
+    if created and not kwargs.get('raw'):
+        Profile.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    lookups.groups.forget(instance)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    lookups.users.forget(instance)
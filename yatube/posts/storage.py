@@ -0,0 +1,46 @@
+import hashlib
+import os
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+HASH_CHUNK_SIZE = 64 * 1024
+SHARD_LEVELS = 2
+SHARD_WIDTH = 2
+
+
+@deconstructible
+class ContentHashStorage(FileSystemStorage):
+    """File system storage that names files after their SHA-256.
+
+    ``posts/photo.jpg`` is stored as ``posts/ab/cd/abcd….jpg``: identical
+    uploads share one file (and its thumbnails), and the two levels of
+    shard directories keep every directory small. A name never changes
+    content, so the files can be cached forever; ``manage.py gc_media``
+    removes the ones no post refers to any more.
+    """
+
+    def content_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+        digest = digest.hexdigest()
+        shards = [digest[i * SHARD_WIDTH:(i + 1) * SHARD_WIDTH]
+                  for i in range(SHARD_LEVELS)]
+        extension = os.path.splitext(name)[1].lower()
+        return '/'.join([os.path.dirname(name), *shards,
+                         digest + extension]).lstrip('/')
+
+    def _save(self, name, content):
+        name = self.content_name(name, content)
+        if self.exists(name):
+            # A fresh mtime keeps gc_media, which spares recent files, from
+            # deleting an orphan that a post is about to refer to again.
+            try:
+                os.utime(self.path(name))
+                return name
+            except FileNotFoundError:
+                pass
+        # Two identical uploads racing past exists() end up as two files;
+        # the one that loses is orphaned and collected by gc_media.
+        return super()._save(name, content)
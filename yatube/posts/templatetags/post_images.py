@@ -0,0 +1,19 @@
+from django import template
+
+from .. import thumbnails
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_thumbnail(post, size):
+    """``{% post_thumbnail post 'card-960-jpeg' as im %}``, ``None`` if the
+    worker has not built it yet."""
+    return thumbnails.post_thumbnail(post, size)
+
+
+@register.simple_tag
+def post_picture(post):
+    """``{% post_picture post as picture %}``, see
+    :func:`posts.thumbnails.post_picture`."""
+    return thumbnails.post_picture(post)
@@ -0,0 +1,269 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import counters
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class FeedPageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='group',
+            slug='group_1'
+        )
+        cls.post = Post.objects.create(
+            text='test_text',
+            author=cls.user,
+            group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.urls = (
+            reverse('posts:main_posts'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+        )
+
+    def test_guest_pages_are_served_from_cache(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                first = self.guest_client.get(url)
+                with self.assertNumQueries(0):
+                    second = self.guest_client.get(url)
+                self.assertEqual(first.content, second.content)
+
+    def test_pages_are_keyed_by_page_number(self):
+        url = reverse('posts:main_posts')
+        self.guest_client.get(url)
+        response = self.guest_client.get(url, {'page': 2})
+        self.assertIsNotNone(response.context)
+
+    def test_authorized_pages_are_not_cached(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.authorized_client.get(url)
+                response = self.authorized_client.get(url)
+                self.assertIsNotNone(response.context)
+
+    def test_post_save_and_delete_invalidate_pages(self):
+        for url in self.urls:
+            self.guest_client.get(url)
+        post = Post.objects.create(text='brand new post', author=self.user,
+                                   group=self.group)
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertContains(self.guest_client.get(url), post.text)
+        post.delete()
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertNotContains(self.guest_client.get(url), post.text)
+
+    def test_group_and_comment_changes_invalidate_pages(self):
+        url = self.urls[1]
+        self.guest_client.get(url)
+        self.group.description = 'new description'
+        self.group.save()
+        self.assertContains(self.guest_client.get(url), 'new description')
+        Comment.objects.create(post=self.post, author=self.user, text='hi')
+        self.assertIsNotNone(self.guest_client.get(url).context)
+
+
+class PostCardCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='group',
+            slug='group_1'
+        )
+        cls.post = Post.objects.create(
+            text='test_text',
+            author=cls.user,
+            group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def card_key(self, post):
+        return make_template_fragment_key(
+            'post_card', [post.pk, post.updated_at, True])
+
+    def test_card_is_shared_by_every_feed(self):
+        self.authorized_client.get(reverse('posts:main_posts'))
+        key = self.card_key(self.post)
+        self.assertIn('test_text', cache.get(key))
+        cache.set(key, 'cached card')
+        urls = (
+            reverse('posts:main_posts'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertContains(self.authorized_client.get(url),
+                                    'cached card')
+
+    def test_edit_renews_the_card(self):
+        url = reverse('posts:main_posts')
+        self.authorized_client.get(url)
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.pk}),
+            {'text': 'edited text', 'group': self.group.pk})
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertGreater(post.updated_at, self.post.updated_at)
+        response = self.authorized_client.get(url)
+        self.assertContains(response, 'edited text')
+        self.assertNotContains(response, 'test_text')
+
+    def test_author_rename_renews_the_card(self):
+        url = reverse('posts:main_posts')
+        self.authorized_client.get(url)
+        user = User.objects.get(pk=self.user.pk)
+        user.first_name = 'Лев'
+        user.last_name = 'Толстой'
+        user.save()
+        self.assertContains(self.authorized_client.get(url), 'Лев Толстой')
+        user.username = 'tolstoy'
+        user.save()
+        self.assertContains(self.authorized_client.get(url),
+                            reverse('posts:profile', args=['tolstoy']))
+
+    def test_group_slug_change_renews_the_card(self):
+        url = reverse('posts:main_posts')
+        self.authorized_client.get(url)
+        group = Group.objects.get(pk=self.group.pk)
+        group.slug = 'renamed'
+        group.save()
+        self.assertContains(self.authorized_client.get(url),
+                            reverse('posts:group_list', args=['renamed']))
+
+    def test_login_leaves_the_cards_alone(self):
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(1):
+            user.save(update_fields=['last_login'])
+        self.assertEqual(Post.objects.get(pk=self.post.pk).updated_at,
+                         self.post.updated_at)
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='group',
+            slug='group_1'
+        )
+        cls.post = Post.objects.create(
+            text='test_text',
+            author=cls.author,
+            group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.urls = {
+            'index': reverse('posts:main_posts'),
+            'group': reverse('posts:group_list',
+                             kwargs={'slug': self.group.slug}),
+            'profile': reverse('posts:profile',
+                               kwargs={'username': self.author}),
+            'post': reverse('posts:post_detail',
+                            kwargs={'post_id': self.post.pk}),
+        }
+
+    def revalidate(self, url, client=None):
+        client = client or self.authorized_client
+        etag = client.get(url)['ETag']
+        return client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_pages_are_not_modified(self):
+        for url in self.urls.values():
+            for client in (self.guest_client, self.authorized_client):
+                with self.subTest(url=url, client=client):
+                    response = client.get(url)
+                    self.assertIn('Last-Modified', response)
+                    with CaptureQueriesContext(connection) as queries:
+                        response = client.get(
+                            url, HTTP_IF_NONE_MATCH=response['ETag'])
+                    self.assertEqual(response.status_code, 304)
+                    if url != self.urls['profile']:
+                        self.assertFalse(
+                            [query for query in queries
+                             if 'posts_' in query['sql']])
+
+    def test_visitors_get_their_own_etags(self):
+        for url in self.urls.values():
+            with self.subTest(url=url):
+                self.assertNotEqual(self.guest_client.get(url)['ETag'],
+                                    self.authorized_client.get(url)['ETag'])
+
+    def test_changes_refresh_the_etag(self):
+        extra = Post.objects.create(text='extra', author=self.author,
+                                    group=self.group)
+        changes = {
+            'index': lambda: Post.objects.create(text='new',
+                                                 author=self.author),
+            'group': extra.delete,
+            'post': lambda: Comment.objects.create(
+                post=self.post, author=self.user, text='comment'),
+            'profile': lambda: self.authorized_client.get(reverse(
+                'posts:profile_follow', kwargs={'username': self.author})),
+        }
+        for name, change in changes.items():
+            with self.subTest(page=name):
+                url = self.urls[name]
+                etag = self.authorized_client.get(url)['ETag']
+                change()
+                response = self.authorized_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etag)
+
+    def test_deleting_older_content_refreshes_the_etag(self):
+        older = Post.objects.create(text='older', author=self.author)
+        comment = Comment.objects.create(post=self.post, author=self.user,
+                                         text='older comment')
+        newer = Comment.objects.create(post=self.post, author=self.user,
+                                       text='newer comment')
+        for counted in (comment, newer):
+            counters.comment_created(counted)
+        # The deleted post and comment are not the latest ones.
+        Post.objects.filter(pk=self.post.pk).update(
+            updated_at=timezone.now())
+        deletes = {'profile': older.delete, 'post': comment.delete}
+        for name, delete in deletes.items():
+            with self.subTest(page=name):
+                url = self.urls[name]
+                etag = self.authorized_client.get(url)['ETag']
+                delete()
+                response = self.authorized_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_profile_uses_the_follow_from_the_check(self):
+        Follow.objects.create(user=self.user, author=self.author)
+        response = self.authorized_client.get(self.urls['profile'])
+        self.assertTrue(response.context['following'])
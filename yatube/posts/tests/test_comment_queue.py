@@ -0,0 +1,65 @@
+import threading
+from concurrent.futures import Future
+
+from django.core.cache import cache
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from ..comment_queue import CommentWriter
+from ..models import Comment, Post, User
+
+WRITERS = 20
+
+
+@override_settings(COMMENT_WRITE_QUEUE=True)
+class CommentQueueTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='auth')
+        self.post = Post.objects.create(text='post', author=self.user)
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_author_sees_the_comment_after_the_redirect(self):
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        self.client.get(url)
+        response = self.client.post(
+            reverse('posts:add_comment', args=[self.post.pk]),
+            {'text': 'queued'}, follow=True)
+        self.assertContains(response, 'queued')
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+
+    def test_concurrent_comments_are_all_written(self):
+        writer = CommentWriter()
+        futures = []
+
+        def comment(i):
+            futures.append(writer.submit(Comment(
+                post=self.post, author=self.user, text=f'comment {i}')))
+
+        threads = [threading.Thread(target=comment, args=(i,))
+                   for i in range(WRITERS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for future in futures:
+            future.result(timeout=5)
+        self.assertEqual(self.post.comments.count(), WRITERS)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, WRITERS)
+
+    def test_failed_comment_does_not_fail_its_batch(self):
+        good, bad = Future(), Future()
+        with self.assertLogs('posts.comment_queue', 'ERROR'):
+            CommentWriter()._write([
+                (Comment(post=self.post, author=self.user, text='good'),
+                 good),
+                (Comment(post_id=self.post.pk + 1, author=self.user,
+                         text='bad'), bad),
+            ])
+        self.assertEqual(good.result().text, 'good')
+        self.assertIsNotNone(bad.exception())
+        self.assertEqual(list(self.post.comments.values_list(
+            'text', flat=True)), ['good'])
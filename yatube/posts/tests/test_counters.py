@@ -0,0 +1,94 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Post, Profile
+
+User = get_user_model()
+
+
+class CounterTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def profile(self, user):
+        return Profile.objects.get(user=user)
+
+    def test_profile_is_created_with_user(self):
+        user = User.objects.create_user(username='new')
+        self.assertEqual(self.profile(user).post_count, 0)
+
+    def test_write_paths_update_counters(self):
+        self.author_client.post(reverse('posts:post_create'),
+                                data={'text': 'new post'})
+        self.assertEqual(self.profile(self.author).post_count, 1)
+        post = Post.objects.get(text='new post')
+        self.authorized_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': post.pk}),
+            data={'text': 'comment'})
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 1)
+        follow_url = reverse('posts:profile_follow',
+                             args=[self.author.username])
+        self.authorized_client.get(follow_url)
+        self.authorized_client.get(follow_url)
+        self.assertEqual(self.profile(self.author).follower_count, 1)
+        self.assertEqual(self.profile(self.user).following_count, 1)
+        self.authorized_client.get(
+            reverse('posts:profile_unfollow', args=[self.author.username]))
+        self.assertEqual(self.profile(self.author).follower_count, 0)
+        self.assertEqual(self.profile(self.user).following_count, 0)
+
+    def test_deletes_update_counters(self):
+        self.author_client.post(reverse('posts:post_create'),
+                                data={'text': 'new post'})
+        post = Post.objects.get(text='new post')
+        self.authorized_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': post.pk}),
+            data={'text': 'comment'})
+        post.comments.get().delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 0)
+        post.delete()
+        self.assertEqual(self.profile(self.author).post_count, 0)
+        # Drifted counters stay at zero instead of failing the delete.
+        Post.objects.create(text='uncounted', author=self.author).delete()
+        self.assertEqual(self.profile(self.author).post_count, 0)
+
+    def test_counters_are_rendered(self):
+        Post.objects.create(text='post', author=self.author)
+        Profile.objects.filter(user=self.author).update(post_count=7,
+                                                        follower_count=3)
+        response = self.authorized_client.get(
+            reverse('posts:profile', args=[self.author.username]))
+        self.assertEqual(response.context['total_num_posts'], 7)
+        self.assertContains(response, 'Подписчиков: 3')
+
+    def test_reconcile_counters_repairs_drift(self):
+        post = Post.objects.create(text='post', author=self.author)
+        Comment.objects.create(post=post, author=self.user, text='comment')
+        Follow.objects.create(user=self.user, author=self.author)
+        Profile.objects.filter(user=self.user).delete()
+        out = StringIO()
+        call_command('reconcile_counters', stdout=out)
+        self.assertIn('2 profiles, 1 posts', out.getvalue())
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 1)
+        self.assertEqual(self.profile(self.author).post_count, 1)
+        self.assertEqual(self.profile(self.author).follower_count, 1)
+        self.assertEqual(self.profile(self.user).following_count, 1)
+        out = StringIO()
+        call_command('reconcile_counters', stdout=out)
+        self.assertIn('0 profiles, 0 posts', out.getvalue())
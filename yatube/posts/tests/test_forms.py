@@ -200,4 +200,5 @@ class PostImageTests(TestCase):
             'image': file
         }, follow=True)
         self.assertEqual(response.status_code, 200)
-        self.assertTrue(Post.objects.filter(text=text).exists())
+        self.assertTrue(response.context['form'].errors['image'])
+        self.assertFalse(Post.objects.filter(text=text).exists())
@@ -0,0 +1,74 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Follow, Post, User
+
+
+class JsonEndpointTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(text='post', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.follow_url = reverse('posts:profile_follow_json',
+                                  args=[self.author.username])
+        self.unfollow_url = reverse('posts:profile_unfollow_json',
+                                    args=[self.author.username])
+
+    def test_comment_returns_its_fragment_and_count(self):
+        response = self.client.post(
+            reverse('posts:add_comment_json', args=[self.post.pk]),
+            {'text': 'комментарий'})
+        self.assertEqual(response.status_code, 201)
+        self.assertIn('комментарий', response.json()['html'])
+        self.assertIn(self.user.username, response.json()['html'])
+        self.assertEqual(response.json()['comment_count'], 1)
+        self.assertEqual(self.post.comments.count(), 1)
+
+    def test_invalid_comment_returns_the_errors(self):
+        response = self.client.post(
+            reverse('posts:add_comment_json', args=[self.post.pk]),
+            {'text': ''})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('text', response.json()['errors'])
+
+    def test_follow_is_one_idempotent_insert(self):
+        for _ in range(2):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(self.follow_url)
+            self.assertEqual(response.json(), {
+                'following': True, 'follower_count': 1,
+                'following_count': 0})
+            follow_statements = [query['sql'] for query in queries
+                                 if 'posts_follow' in query['sql']]
+            self.assertEqual(len(follow_statements), 1)
+            self.assertTrue(follow_statements[0].startswith('INSERT'))
+        self.assertEqual(Follow.objects.count(), 1)
+
+    def test_unfollow_is_one_idempotent_delete(self):
+        self.client.post(self.follow_url)
+        for _ in range(2):
+            response = self.client.post(self.unfollow_url)
+            self.assertEqual(response.json(), {
+                'following': False, 'follower_count': 0,
+                'following_count': 0})
+        self.assertFalse(Follow.objects.exists())
+
+    def test_self_follow_is_ignored(self):
+        self.client.force_login(self.author)
+        response = self.client.post(self.follow_url)
+        self.assertFalse(response.json()['following'])
+        self.assertFalse(Follow.objects.exists())
+
+    def test_guests_and_get_requests_are_refused(self):
+        self.assertEqual(Client().post(self.follow_url).status_code, 401)
+        self.assertEqual(self.client.get(self.follow_url).status_code, 405)
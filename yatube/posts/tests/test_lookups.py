@@ -0,0 +1,79 @@
+from unittest import mock
+
+from django.db import connection
+from django.http import Http404
+from django.test import TestCase
+from django.urls import reverse
+
+from posts import lookups
+from posts.lookups import LookupCache
+from posts.models import Follow, Group, Profile, User
+
+
+class LookupCacheTests(TestCase):
+    def setUp(self):
+        lookups.groups.clear()
+        lookups.users.clear()
+        self.group = Group.objects.create(title='group', slug='group')
+        self.now = 1000.0
+
+    def test_hits_and_misses_are_cached(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(lookups.groups.get('group'), self.group)
+        with self.assertNumQueries(0):
+            group = lookups.groups.get('group')
+            self.assertEqual(group.title, 'group')
+        with self.assertNumQueries(1):
+            for _ in range(3):
+                with self.assertRaises(Http404):
+                    lookups.groups.get_or_404('missing')
+
+    def test_every_hit_is_a_new_instance(self):
+        lookups.groups.get('group').title = 'changed'
+        self.assertEqual(lookups.groups.get('group').title, 'group')
+
+    def test_saves_and_deletes_are_seen(self):
+        self.assertIsNone(lookups.users.get('new'))
+        user = User.objects.create_user(username='new')
+        self.assertEqual(lookups.users.get('new'), user)
+
+        lookups.groups.get('group')
+        self.group.slug = 'renamed'
+        self.group.save()
+        self.assertIsNone(lookups.groups.get('group'))
+        self.assertEqual(lookups.groups.get('renamed'), self.group)
+        self.group.delete()
+        self.assertIsNone(lookups.groups.get('renamed'))
+
+    def test_entries_are_bounded_in_number_and_age(self):
+        cache = LookupCache(Group, 'slug', size=2, timeout=10)
+        with mock.patch('posts.lookups.time.monotonic', lambda: self.now):
+            for slug in ('group', 'other', 'third'):
+                cache.get(slug)
+            self.assertEqual(list(cache.entries), ['other', 'third'])
+            self.now += 10
+            with self.assertNumQueries(1):
+                cache.get('third')
+
+    def test_missing_group_and_user_pages_skip_the_database(self):
+        for url in ('/group/missing/', '/profile/missing/'):
+            self.assertEqual(self.client.get(url).status_code, 404)
+            with self.assertNumQueries(0):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_user_deleted_by_another_worker_is_not_found(self):
+        author = User.objects.create_user(username='gone')
+        reader = User.objects.create_user(username='reader')
+        lookups.users.get('gone')
+        # Another worker's delete sends no signal to this one.
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM posts_profile WHERE user_id = %s',
+                           [author.pk])
+            cursor.execute('DELETE FROM auth_user WHERE id = %s', [author.pk])
+        self.assertIsNotNone(lookups.users.get('gone'))
+        self.client.force_login(reader)
+        response = self.client.get(reverse('posts:profile', args=['gone']))
+        self.assertEqual(response.status_code, 404)
+        self.client.get(reverse('posts:profile_follow', args=['gone']))
+        self.assertFalse(Follow.objects.exists())
+        self.assertFalse(Profile.objects.filter(user_id=author.pk).exists())
@@ -0,0 +1,99 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test import Client, TestCase, override_settings
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+HASHED = 'posts/ab/cd/' + 'abcd' * 16 + '.jpg'
+PLAIN = 'posts/seed/plain.jpg'
+CONTENT = bytes(range(256)) * 4
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ServeMediaTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        for name in (HASHED, PLAIN):
+            path = os.path.join(TEMP_MEDIA_ROOT, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as file:
+                file.write(CONTENT)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client = Client()
+
+    def get(self, name, **headers):
+        return self.client.get(settings.MEDIA_URL + name, **headers)
+
+    def test_file_is_served_with_validators(self):
+        response = self.get(HASHED)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(response['Content-Length'], str(len(CONTENT)))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('ETag', response)
+        self.assertIn('Last-Modified', response)
+
+    def test_cache_lifetime_depends_on_name(self):
+        self.assertIn('immutable', self.get(HASHED)['Cache-Control'])
+        self.assertIn(f'max-age={settings.MEDIA_CACHE_MAX_AGE}',
+                      self.get(PLAIN)['Cache-Control'])
+        self.assertNotIn('immutable', self.get(PLAIN)['Cache-Control'])
+
+    def test_matching_etag_is_not_modified(self):
+        etag = self.get(HASHED)['ETag']
+        response = self.get(HASHED, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_ranges(self):
+        size = len(CONTENT)
+        cases = (
+            ('bytes=0-99', 0, 99),
+            ('bytes=1000-', 1000, size - 1),
+            ('bytes=-10', size - 10, size - 1),
+            ('bytes=10-5000', 10, size - 1),
+        )
+        for header, start, end in cases:
+            with self.subTest(header=header):
+                response = self.get(HASHED, HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(response['Content-Range'],
+                                 f'bytes {start}-{end}/{size}')
+                self.assertEqual(b''.join(response.streaming_content),
+                                 CONTENT[start:end + 1])
+
+    def test_unsatisfiable_range(self):
+        response = self.get(HASHED, HTTP_RANGE=f'bytes={len(CONTENT)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(CONTENT)}')
+
+    def test_stale_if_range_sends_whole_file(self):
+        response = self.get(HASHED, HTTP_RANGE='bytes=0-9',
+                            HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_missing_and_outside_files_are_not_found(self):
+        for name in ('posts/missing.jpg', 'posts', '../settings.py'):
+            with self.subTest(name=name):
+                self.assertEqual(self.get(name).status_code, 404)
+
+    def test_sendfile_offload(self):
+        with self.settings(MEDIA_SENDFILE='X-Accel-Redirect'):
+            response = self.get(HASHED)
+            self.assertEqual(response['X-Accel-Redirect'],
+                             settings.MEDIA_ACCEL_PREFIX + HASHED)
+            self.assertEqual(response.content, b'')
+        with self.settings(MEDIA_SENDFILE='X-Sendfile'):
+            response = self.get(HASHED)
+            self.assertEqual(response['X-Sendfile'],
+                             os.path.join(TEMP_MEDIA_ROOT, HASHED))
@@ -0,0 +1,184 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ..caching import post_count_key
+from ..models import Group, Post
+from ..paginators import FeedPaginator, decode_cursor, encode_cursor
+
+User = get_user_model()
+
+POSTS_QUANTITY = 15
+POSTS_QUANTITY_ON_FIRST_PAGE = 10
+POST_QUANTITY_ON_SECOND_PAGE = 5
+
+
+class CursorPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='group',
+            slug='group_1'
+        )
+        for i in range(POSTS_QUANTITY):
+            Post.objects.create(
+                text=f'test_text {i + 1}',
+                author=cls.user,
+                group=cls.group
+            )
+        # Одинаковая дата у всех постов: порядок держится только на id.
+        Post.objects.update(pub_date=timezone.now())
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_cursor_round_trip(self):
+        post = Post.objects.first()
+        self.assertEqual(decode_cursor(encode_cursor(post)),
+                         (post.pub_date, post.pk))
+
+    def test_after_cursor_on_every_feed(self):
+        urls = (
+            reverse('posts:main_posts'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                first_page = self.authorized_client.get(url).context[
+                    'page_obj']
+                cursor = encode_cursor(first_page[len(first_page) - 1])
+                response = self.authorized_client.get(
+                    url, {'after': cursor})
+                page_obj = response.context['page_obj']
+                self.assertEqual(len(page_obj), POST_QUANTITY_ON_SECOND_PAGE)
+                self.assertFalse(page_obj.has_next())
+                self.assertTrue(page_obj.has_previous())
+                self.assertEqual(
+                    [post.pk for post in page_obj],
+                    list(Post.objects.order_by('-id').values_list(
+                        'pk', flat=True)[POSTS_QUANTITY_ON_FIRST_PAGE:]))
+
+    def test_before_cursor_returns_previous_page(self):
+        url = reverse('posts:main_posts')
+        last_post = Post.objects.order_by('-id')[
+            POSTS_QUANTITY_ON_FIRST_PAGE]
+        response = self.authorized_client.get(
+            url, {'before': encode_cursor(last_post)})
+        page_obj = response.context['page_obj']
+        self.assertEqual(len(page_obj), POSTS_QUANTITY_ON_FIRST_PAGE)
+        self.assertFalse(page_obj.has_previous())
+        self.assertTrue(page_obj.has_next())
+        self.assertEqual(page_obj[0], Post.objects.order_by('-id')[0])
+
+    def test_malformed_cursor_falls_back_to_first_page(self):
+        response = self.authorized_client.get(
+            reverse('posts:main_posts'), {'after': 'not-a-cursor'})
+        page_obj = response.context['page_obj']
+        self.assertEqual(len(page_obj), POSTS_QUANTITY_ON_FIRST_PAGE)
+        self.assertFalse(page_obj.has_previous())
+
+    def test_cursor_links_are_rendered(self):
+        response = self.authorized_client.get(
+            reverse('posts:main_posts'),
+            {'after': encode_cursor(Post.objects.order_by('-id')[3])})
+        self.assertContains(
+            response, f'?after={response.context["page_obj"].next_cursor}')
+        self.assertContains(
+            response,
+            f'?before={response.context["page_obj"].previous_cursor}')
+
+
+class CountFreePaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='group',
+            slug='group_1'
+        )
+        cls.group_2 = Group.objects.create(
+            title='group_2',
+            slug='group_2'
+        )
+        for i in range(POSTS_QUANTITY):
+            Post.objects.create(
+                text=f'test_text {i + 1}',
+                author=cls.user,
+                group=cls.group
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def count_queries(self, paginator, number=1):
+        with CaptureQueriesContext(connection) as queries:
+            list(paginator.get_page(number))
+            paginator.num_pages
+        return [query['sql'] for query in queries
+                if 'COUNT(' in query['sql']]
+
+    def test_count_is_read_from_cache(self):
+        key = post_count_key('all')
+        self.assertEqual(
+            len(self.count_queries(FeedPaginator(Post.objects.all(), 10,
+                                                 count_key=key))), 1)
+        self.assertEqual(cache.get(key), POSTS_QUANTITY)
+        self.assertEqual(
+            self.count_queries(FeedPaginator(Post.objects.all(), 10,
+                                             count_key=key)), [])
+
+    def test_counters_are_refreshed_on_save_and_delete(self):
+        keys = {
+            post_count_key('all'): Post.objects.all(),
+            post_count_key('author', self.user.pk): self.user.posts.all(),
+            post_count_key('group', self.group.pk): self.group.posts.all(),
+            post_count_key('group', self.group_2.pk):
+                self.group_2.posts.all(),
+        }
+
+        def assert_counts():
+            for key, posts in keys.items():
+                paginator = FeedPaginator(posts, 10, count_key=key)
+                with self.subTest(key=key):
+                    self.assertEqual(paginator.count, posts.count())
+
+        assert_counts()
+        post = Post.objects.create(text='new', author=self.user,
+                                   group=self.group)
+        assert_counts()
+        post.group = self.group_2
+        post.save()
+        assert_counts()
+        post.delete()
+        assert_counts()
+
+    def test_has_next_mode_runs_no_count(self):
+        paginator = FeedPaginator(Post.objects.all(), 10, exact_count=False)
+        self.assertEqual(self.count_queries(paginator), [])
+        page = paginator.get_page(1)
+        self.assertEqual(len(page), POSTS_QUANTITY_ON_FIRST_PAGE)
+        self.assertTrue(page.has_next())
+        page = paginator.get_page(2)
+        self.assertEqual(len(page), POST_QUANTITY_ON_SECOND_PAGE)
+        self.assertFalse(page.has_next())
+        self.assertEqual(len(paginator.get_page(100)),
+                         POSTS_QUANTITY_ON_FIRST_PAGE)
+
+    def test_page_window_is_bounded(self):
+        paginator = FeedPaginator(Post.objects.all(), 1)
+        self.assertEqual(paginator.get_page_window(8),
+                         [1, None, 6, 7, 8, 9, 10, None, 15])
+        self.assertEqual(paginator.get_page_window(1),
+                         [1, 2, 3, None, 15])
+        self.assertEqual(paginator.get_page_window(15),
+                         [1, None, 13, 14, 15])
+        self.assertEqual(len(paginator.get_page(8).page_window), 9)
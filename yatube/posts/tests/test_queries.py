@@ -0,0 +1,73 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+from .utils import QueryBudgetMixin
+
+User = get_user_model()
+
+ROWS_TO_ADD = 5
+
+
+class ReadViewQueryTests(QueryBudgetMixin, TestCase):
+    """Read views run the same number of queries however many rows."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='group',
+            slug='group_1'
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+        cls.post = Post.objects.create(
+            text='first',
+            author=cls.author,
+            group=cls.group
+        )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def add_rows(self):
+        for i in range(ROWS_TO_ADD):
+            author = User.objects.create_user(username=f'author_{i}')
+            Follow.objects.create(user=self.user, author=author)
+            Post.objects.create(text=f'post {i}', author=author,
+                                group=self.group)
+            Post.objects.create(text=f'own {i}', author=self.author)
+            Comment.objects.create(post=self.post, author=author,
+                                   text=f'comment {i}')
+
+    def assertViewQueries(self, url, budget):
+        def request():
+            cache.clear()
+            response = self.authorized_client.get(url)
+            self.assertEqual(response.status_code, 200)
+        self.assertConstantQueries(request, self.add_rows, budget)
+
+    # The budgets of index, group_posts and post_detail include the
+    # conditional GET check, which is cached after the first request.
+    def test_index(self):
+        self.assertViewQueries(reverse('posts:main_posts'), 5)
+
+    def test_group_posts(self):
+        self.assertViewQueries(
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}), 6)
+
+    def test_profile(self):
+        self.assertViewQueries(
+            reverse('posts:profile', kwargs={'username': self.author}), 6)
+
+    def test_post_detail(self):
+        self.assertViewQueries(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+            5)
+
+    def test_follow_index(self):
+        self.assertViewQueries(reverse('posts:follow_index'), 4)
@@ -0,0 +1,78 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+FULL_SCAN = re.compile(r'\bSCAN (TABLE )?\S+$')
+TEMP_SORT = 'USE TEMP B-TREE'
+
+
+class QueryPlanTests(TestCase):
+    """Every query of the read views must be served by an index."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='group',
+            slug='group_1'
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+        for i in range(3):
+            cls.post = Post.objects.create(
+                text=f'test_text {i}',
+                author=cls.author,
+                group=cls.group
+            )
+            Comment.objects.create(post=cls.post, author=cls.user,
+                                   text=f'comment {i}')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def assert_indexed(self, url, params=None):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.authorized_client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        for query in queries:
+            sql = query['sql']
+            if not sql.startswith('SELECT'):
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                plan = [row[-1] for row in cursor.fetchall()]
+            for step in plan:
+                with self.subTest(url=url, sql=sql, step=step):
+                    self.assertIsNone(FULL_SCAN.search(step))
+                    self.assertNotIn(TEMP_SORT, step)
+
+    def test_read_views_use_indexes(self):
+        urls = (
+            reverse('posts:main_posts'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.author}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+            reverse('posts:follow_index'),
+        )
+        for url in urls:
+            self.assert_indexed(url)
+            self.assert_indexed(url, {'page': 2})
+            self.assert_indexed(url, {'after': '1,1'})
+            self.assert_indexed(url, {'before': '1,1'})
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_follow_index_pull_path_uses_indexes(self):
+        self.assert_indexed(reverse('posts:follow_index'))
@@ -0,0 +1,68 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db.models import Count, F
+from django.test import TestCase, override_settings
+
+from ..models import Comment, Follow, Group, Post, Profile, Timeline, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class SeedCommandTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def seed(self, *args):
+        out = StringIO()
+        call_command('seed_yatube', '--users', '50', '--posts', '600',
+                     '--follows', '200', '--comments', '300',
+                     '--images', '3', '--batch-size', '100', '--seed', '1',
+                     *args, stdout=out)
+        return out.getvalue()
+
+    def test_rows_are_created(self):
+        out = self.seed()
+        self.assertEqual(User.objects.count(), 50)
+        self.assertEqual(Group.objects.count(), 1)
+        self.assertEqual(Post.objects.count(), 600)
+        self.assertEqual(Follow.objects.count(), 200)
+        self.assertEqual(Comment.objects.count(), 300)
+        self.assertFalse(Follow.objects.filter(
+            user=F('author')).exists())
+        self.assertIn('rows/s', out)
+
+    def test_counters_and_timelines_are_rebuilt(self):
+        self.seed()
+        self.assertEqual(Profile.objects.count(), 50)
+        profile = Profile.objects.order_by('-post_count').first()
+        self.assertEqual(profile.post_count, profile.user.posts.count())
+        follow = Follow.objects.first()
+        self.assertTrue(Timeline.objects.filter(
+            user=follow.user, post__author=follow.author).exists())
+
+    def test_author_popularity_is_skewed(self):
+        self.seed()
+        posts = list(User.objects.annotate(total=Count('posts')).order_by(
+            '-total').values_list('total', flat=True))
+        self.assertGreater(posts[0], posts[len(posts) // 2] * 5)
+
+    def test_images_come_from_a_small_pool(self):
+        self.seed('--image-share', '1')
+        names = set(Post.objects.values_list('image', flat=True))
+        self.assertEqual(len(names), 3)
+        storage = Post._meta.get_field('image').storage
+        for name in names:
+            self.assertTrue(storage.exists(name))
+
+    def test_seeding_twice_adds_rows(self):
+        self.seed()
+        self.seed()
+        self.assertEqual(User.objects.count(), 100)
+        self.assertEqual(Post.objects.count(), 1200)
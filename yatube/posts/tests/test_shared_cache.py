@@ -0,0 +1,104 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase
+
+from core.cache import SQLiteCache
+
+INCREMENTS = 200
+PROCESSES = 4
+
+
+def increment(location):
+    cache = SQLiteCache(location, {})
+    for _ in range(INCREMENTS):
+        cache.incr('counter')
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.location = os.path.join(self.directory, 'cache.sqlite3')
+        self.cache = SQLiteCache(self.location, {})
+        self.now = 1000.0
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def clock(self):
+        return mock.patch('core.cache.time.time', lambda: self.now)
+
+    def test_values_round_trip(self):
+        values = {'int': 7, 'bool': True, 'text': 'текст',
+                  'dict': {'a': [1, 2]}, 'bytes': b'\x00', 'none': None}
+        self.cache.set_many(values)
+        self.assertEqual(self.cache.get_many([*values, 'missing']), values)
+        self.assertIs(self.cache.get('bool'), True)
+        self.cache.delete_many(['int', 'text'])
+        self.assertEqual(self.cache.get('int', 'default'), 'default')
+        self.cache.clear()
+        self.assertEqual(self.cache.size(), 0)
+
+    def test_processes_share_the_cache(self):
+        SQLiteCache(self.location, {}).set('shared', 'value')
+        self.assertEqual(self.cache.get('shared'), 'value')
+
+    def test_timeouts(self):
+        with self.clock():
+            self.cache.set('short', 1, timeout=5)
+            self.cache.set('forever', 1, timeout=None)
+            self.cache.set('zero', 1, timeout=0)
+            self.assertIsNone(self.cache.get('zero'))
+            self.assertTrue(self.cache.add('zero', 2))
+            self.assertTrue(self.cache.has_key('short'))
+            self.now += 5
+            self.assertFalse(self.cache.has_key('short'))
+            self.assertTrue(self.cache.add('short', 2))
+            self.assertFalse(self.cache.add('forever', 2))
+            self.assertEqual(self.cache.get('forever'), 1)
+
+    def test_incr_and_decr(self):
+        self.cache.set('number', 1)
+        self.assertEqual(self.cache.incr('number', 10), 11)
+        self.assertEqual(self.cache.decr('number'), 10)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+        self.cache.set('text', 'a')
+        with self.assertRaises(TypeError):
+            self.cache.incr('text')
+
+    def test_old_sqlite_is_refused(self):
+        with mock.patch('core.cache.sqlite3.sqlite_version_info',
+                        (3, 24, 0)):
+            with self.assertRaisesMessage(ImproperlyConfigured, '3.25.0'):
+                SQLiteCache(self.location, {})
+
+    def test_incr_is_atomic_across_processes(self):
+        self.cache.set('counter', 0)
+        context = multiprocessing.get_context('fork')
+        processes = [context.Process(target=increment,
+                                     args=(self.location,))
+                     for _ in range(PROCESSES)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        self.assertEqual(self.cache.get('counter'), INCREMENTS * PROCESSES)
+
+    def test_least_recently_used_are_evicted_over_budget(self):
+        cache = SQLiteCache(self.location, {'OPTIONS': {'MAX_BYTES': 1000}})
+        with self.clock():
+            for i in range(10):
+                if i == 8:
+                    cache.get('key0')
+                cache.set(f'key{i}', 'x' * 100)
+                self.now += 2
+            self.assertLessEqual(cache.size(), 1000)
+            self.assertIsNotNone(cache.get('key0'))
+            self.assertIsNone(cache.get('key1'))
+            self.assertIsNotNone(cache.get('key9'))
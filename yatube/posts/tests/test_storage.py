@@ -0,0 +1,103 @@
+import os
+import re
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from ..models import Post, User
+from ..thumbnails import CARD_WIDTH, card_size, ready_thumbnail
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+HASHED_NAME = re.compile(r'^posts/([0-9a-f]{2})/([0-9a-f]{2})/\1\2[0-9a-f]{60}'
+                         r'\.png$')
+
+
+def image_file(color='red'):
+    buffer = BytesIO()
+    Image.new('RGB', (60, 30), color).save(buffer, 'PNG')
+    return SimpleUploadedFile('image.png', buffer.getvalue())
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ContentHashStorageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        # Files outlive the rolled back posts of other tests.
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def create_post(self, color='red'):
+        self.authorized_client.post(reverse('posts:post_create'), {
+            'text': 'text',
+            'image': image_file(color),
+        })
+        return Post.objects.latest('pk')
+
+    def gc(self, *args):
+        out = StringIO()
+        call_command('gc_media', '--min-age', '0', *args, stdout=out)
+        return out.getvalue()
+
+    def test_file_is_named_by_content(self):
+        post = self.create_post()
+        self.assertRegex(post.image.name, HASHED_NAME)
+        self.assertTrue(os.path.exists(post.image.path))
+
+    def test_identical_uploads_share_a_file(self):
+        first = self.create_post()
+        second = self.create_post()
+        third = self.create_post('blue')
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertNotEqual(first.image.name, third.image.name)
+        self.assertEqual(len(os.listdir(os.path.dirname(first.image.path))),
+                         1)
+
+    def test_reupload_refreshes_the_modification_time(self):
+        path = self.create_post().image.path
+        os.utime(path, (0, 0))
+        self.create_post()
+        self.assertGreater(os.path.getmtime(path), 0)
+
+    def test_gc_deletes_only_orphans(self):
+        kept = self.create_post()
+        shared = self.create_post('blue')
+        self.create_post('blue')
+        orphan = self.create_post('green')
+        call_command('thumbnail_worker', '--once', stdout=StringIO())
+        thumbnail = ready_thumbnail(orphan.image, card_size(CARD_WIDTH,
+                                                            'JPEG'))
+        orphan_path = orphan.image.path
+        shared.delete()
+        orphan.delete()
+
+        out = self.gc()
+
+        self.assertIn(orphan.image.name, out)
+        self.assertFalse(os.path.exists(orphan_path))
+        self.assertFalse(thumbnail.exists())
+        self.assertTrue(os.path.exists(kept.image.path))
+        self.assertTrue(os.path.exists(shared.image.path))
+
+    def test_gc_dry_run_and_min_age_keep_files(self):
+        post = self.create_post()
+        post.delete()
+        self.assertIn('Would delete 1 files', self.gc('--dry-run'))
+        call_command('gc_media', stdout=StringIO())
+        self.assertTrue(os.path.exists(post.image.path))
@@ -0,0 +1,183 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from ..models import Post, ThumbnailTask, User
+from ..thumbnails import (CARD_FORMATS, CARD_WIDTH, CARD_WIDTHS,
+                          card_size, post_picture, post_thumbnail, prefetch,
+                          ready_thumbnail)
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+PLACEHOLDER = 'aspect-ratio'
+CARD = card_size(CARD_WIDTH, 'JPEG')
+
+
+def image_file(name='image.png', color='red'):
+    buffer = BytesIO()
+    Image.new('RGB', (100, 50), color).save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(),
+                              content_type='image/png')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailWorkerTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        # The cached thumbnail store outlives the rows of other tests.
+        caches[settings.THUMBNAIL_CACHE].clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def create_post(self, color='red'):
+        self.authorized_client.post(reverse('posts:post_create'), {
+            'text': 'post with image',
+            'image': image_file(color=color),
+        })
+        return Post.objects.latest('pk')
+
+    def run_worker(self, *args):
+        call_command('thumbnail_worker', '--once', *args, stdout=StringIO())
+
+    def test_create_queues_thumbnails(self):
+        post = self.create_post()
+        self.assertTrue(post.image)
+        self.assertEqual(list(ThumbnailTask.objects.values_list(
+            'post', 'image')), [(post.pk, post.image.name)])
+
+    def test_placeholder_until_worker_runs(self):
+        post = self.create_post()
+        url = reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        self.assertContains(self.authorized_client.get(url), PLACEHOLDER)
+        self.assertIsNone(ready_thumbnail(post.image, CARD))
+
+        self.run_worker()
+
+        self.assertFalse(ThumbnailTask.objects.exists())
+        thumbnail = ready_thumbnail(post.image, CARD)
+        self.assertEqual(thumbnail.x, CARD_WIDTH)
+        response = self.authorized_client.get(url)
+        self.assertNotContains(response, PLACEHOLDER)
+        self.assertContains(response, thumbnail.url)
+
+    def test_anonymous_page_shows_built_thumbnail(self):
+        post = self.create_post()
+        url = reverse('posts:main_posts')
+        self.assertContains(Client().get(url), PLACEHOLDER)
+        self.run_worker()
+        self.assertContains(Client().get(url),
+                            ready_thumbnail(post.image, CARD).url)
+
+    def test_edit_queues_only_a_new_image(self):
+        post = self.create_post()
+        self.run_worker()
+        url = reverse('posts:post_edit', kwargs={'post_id': post.pk})
+        self.authorized_client.post(url, {'text': 'new text'})
+        self.assertFalse(ThumbnailTask.objects.exists())
+        self.authorized_client.post(url, {'text': 'new text',
+                                          'image': image_file('new.png')})
+        self.assertEqual(ThumbnailTask.objects.count(), 1)
+
+    def test_all_queues_existing_images(self):
+        Post.objects.create(text='no image', author=self.user)
+        post = self.create_post()
+        ThumbnailTask.objects.all().delete()
+        self.run_worker('--all')
+        self.assertIsNotNone(ready_thumbnail(post.image, CARD))
+
+    def test_broken_image_is_dropped(self):
+        post = Post.objects.create(text='missing', author=self.user,
+                                   image='posts/missing.png')
+        ThumbnailTask.objects.create(post=post, image=post.image.name)
+        with self.assertLogs('posts.thumbnails', 'ERROR'):
+            self.run_worker()
+        self.assertFalse(ThumbnailTask.objects.exists())
+        self.assertIsNone(ready_thumbnail(post.image, CARD))
+
+    def test_rebuild_resumes_from_checkpoint(self):
+        done = self.create_post()
+        post = self.create_post('blue')
+        Post.objects.create(text='missing', author=self.user,
+                            image='posts/missing.png')
+        checkpoint = os.path.join(TEMP_MEDIA_ROOT, 'checkpoint')
+        with open(checkpoint, 'w') as checkpoint_file:
+            checkpoint_file.write(str(done.pk))
+        out = StringIO()
+        with self.assertLogs('posts.thumbnails', 'ERROR'):
+            call_command('rebuild_thumbnails', '--workers', '2',
+                         '--checkpoint', checkpoint, stdout=out)
+        self.assertIn('built for 1 images, 1 failed', out.getvalue())
+        self.assertIsNone(ready_thumbnail(done.image, CARD))
+        self.assertIsNotNone(ready_thumbnail(post.image, CARD))
+        self.assertFalse(os.path.exists(checkpoint))
+
+    def test_prefetch_looks_up_a_page_at_once(self):
+        for _ in range(5):
+            self.create_post()
+        Post.objects.create(text='no image', author=self.user)
+        self.run_worker()
+        posts = list(Post.objects.all())
+        prefetch(posts)
+        posts = list(Post.objects.all())
+        # A warm page is one get_many on the thumbnail cache, off the DB.
+        with self.assertNumQueries(0):
+            prefetch(posts)
+        with self.assertNumQueries(0):
+            found = [post_thumbnail(post, CARD) for post in posts]
+        expected = [ready_thumbnail(post.image, CARD) for post in posts]
+        self.assertEqual(
+            [thumbnail and thumbnail.name for thumbnail in found],
+            [thumbnail and thumbnail.name for thumbnail in expected])
+
+    def test_picture_lists_every_width_and_format(self):
+        post = self.create_post()
+        self.assertIsNone(post_picture(post))
+        self.run_worker()
+        picture = post_picture(post)
+        for format_ in CARD_FORMATS:
+            srcset = picture[format_.lower()]
+            for width in CARD_WIDTHS:
+                with self.subTest(format=format_, width=width):
+                    self.assertIn(f' {width}w', srcset)
+                    self.assertIn(
+                        ready_thumbnail(post.image,
+                                        card_size(width, format_)).url,
+                        srcset)
+        self.assertEqual(picture['webp'] is not None,
+                         'WEBP' in CARD_FORMATS)
+
+    def test_feed_images_below_the_first_are_lazy(self):
+        self.create_post()
+        self.create_post()
+        self.run_worker()
+        response = self.authorized_client.get(reverse('posts:main_posts'))
+        self.assertContains(response, '<picture>', count=2)
+        self.assertContains(response, 'loading="lazy"', count=1)
+        self.assertContains(response, 'width="960" height="339"', count=2)
+
+    def test_post_detail_image_is_eager_and_sized_for_the_aside(self):
+        post = self.create_post()
+        self.run_worker()
+        response = self.authorized_client.get(
+            reverse('posts:post_detail', args=[post.pk]))
+        self.assertContains(response, '<picture>', count=1)
+        self.assertNotContains(response, 'loading="lazy"')
+        self.assertContains(response, 'sizes="(max-width: 767px) 100vw, 25vw"')
@@ -0,0 +1,159 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..caching import follow_version_key
+from ..models import Follow, Post, Timeline
+from ..paginators import encode_cursor
+
+User = get_user_model()
+
+POSTS_QUANTITY = 15
+POST_QUANTITY_ON_SECOND_PAGE = 5
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.author_2 = User.objects.create_user(username='author_2')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def follow(self, author):
+        self.authorized_client.get(
+            reverse('posts:profile_follow', args=[author.username]))
+
+    def feed(self, **params):
+        response = self.authorized_client.get(
+            reverse('posts:follow_index'), params)
+        return response.context['page_obj']
+
+    def test_new_post_is_fanned_out_to_followers(self):
+        self.follow(self.author)
+        post = Post.objects.create(text='new', author=self.author)
+        self.assertTrue(
+            Timeline.objects.filter(user=self.user, post=post).exists())
+        self.assertFalse(
+            Timeline.objects.filter(user=self.author, post=post).exists())
+        self.assertEqual(list(self.feed()), [post])
+
+    def test_follow_backfills_and_unfollow_removes(self):
+        post = Post.objects.create(text='old', author=self.author)
+        Post.objects.create(text='other', author=self.author_2)
+        self.follow(self.author)
+        self.assertEqual(list(self.feed()), [post])
+        self.authorized_client.get(
+            reverse('posts:profile_unfollow', args=[self.author.username]))
+        self.assertFalse(Timeline.objects.filter(user=self.user).exists())
+        self.assertEqual(list(self.feed()), [])
+
+    def test_cursor_pages_of_follow_index(self):
+        self.follow(self.author)
+        for i in range(POSTS_QUANTITY):
+            Post.objects.create(text=f'post {i}', author=self.author)
+        first_page = self.feed()
+        cursor = first_page.paginator.cursor_fields
+        second_page = self.feed(
+            after=encode_cursor(first_page[len(first_page) - 1], cursor))
+        self.assertEqual(len(second_page), POST_QUANTITY_ON_SECOND_PAGE)
+        self.assertFalse(second_page.has_next())
+        self.assertEqual(
+            [post.pk for post in list(first_page) + list(second_page)],
+            list(Post.objects.order_by('-pub_date', '-id').values_list(
+                'pk', flat=True)))
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_popular_author_is_pulled_on_read(self):
+        fan = User.objects.create_user(username='fan')
+        Follow.objects.create(user=fan, author=self.author)
+        self.follow(self.author)
+        self.follow(self.author_2)
+        post = Post.objects.create(text='popular', author=self.author)
+        post_2 = Post.objects.create(text='regular', author=self.author_2)
+        self.assertFalse(Timeline.objects.filter(post=post).exists())
+        self.assertEqual(list(self.feed()), [post_2, post])
+
+    def test_rebuild_timeline_command(self):
+        self.follow(self.author)
+        post = Post.objects.create(text='new', author=self.author)
+        Timeline.objects.all().delete()
+        call_command('rebuild_timeline', '--user', self.user.username,
+                     stdout=StringIO())
+        self.assertEqual(
+            list(Timeline.objects.values_list('user', 'post')),
+            [(self.user.pk, post.pk)])
+
+
+class FollowFeedCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.author_2 = User.objects.create_user(username='author_2')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.authorized_client.get(
+            reverse('posts:profile_follow', args=[self.author.username]))
+
+    def get_feed(self):
+        return self.authorized_client.get(reverse('posts:follow_index'))
+
+    def test_repeat_visit_reads_no_posts_tables(self):
+        Post.objects.create(text='cached', author=self.author)
+        first = self.get_feed()
+        with CaptureQueriesContext(connection) as queries:
+            second = self.get_feed()
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(
+            [query['sql'] for query in queries if 'posts_' in query['sql']],
+            [])
+
+    def test_new_and_edited_posts_show_up_at_once(self):
+        self.get_feed()
+        post = Post.objects.create(text='fresh', author=self.author)
+        self.assertContains(self.get_feed(), 'fresh')
+        post.text = 'edited'
+        post.save()
+        self.assertContains(self.get_feed(), 'edited')
+        post.delete()
+        self.assertNotContains(self.get_feed(), 'edited')
+
+    def test_other_authors_keep_the_version(self):
+        self.get_feed()
+        version = cache.get(follow_version_key(self.user.pk))
+        Post.objects.create(text='unrelated', author=self.author_2)
+        self.assertEqual(cache.get(follow_version_key(self.user.pk)),
+                         version)
+
+    def test_follow_and_unfollow_refresh_the_feed(self):
+        Post.objects.create(text='second author', author=self.author_2)
+        self.assertNotContains(self.get_feed(), 'second author')
+        self.authorized_client.get(
+            reverse('posts:profile_follow', args=[self.author_2.username]))
+        self.assertContains(self.get_feed(), 'second author')
+        self.authorized_client.get(
+            reverse('posts:profile_unfollow', args=[self.author_2.username]))
+        self.assertNotContains(self.get_feed(), 'second author')
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_pull_author_posts_show_up_at_once(self):
+        self.get_feed()
+        Post.objects.create(text='pulled', author=self.author)
+        self.assertFalse(Timeline.objects.exists())
+        self.assertContains(self.get_feed(), 'pulled')
@@ -0,0 +1,102 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image, features
+
+from ..models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def image_file(name='image.jpg', size=(100, 50), format_='JPEG', **options):
+    buffer = BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, format_, **options)
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImageUploadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.authorized_client = Client(enforce_csrf_checks=True)
+        self.authorized_client.force_login(self.user)
+
+    def post(self, image, url=None):
+        url = url or reverse('posts:post_create')
+        csrf_token = self.authorized_client.get(url).context['csrf_token']
+        return self.authorized_client.post(url, {
+            'text': 'text',
+            'image': image,
+            'csrfmiddlewaretoken': str(csrf_token),
+        })
+
+    def assertImageError(self, response, code):
+        errors = response.context['form'].errors.as_data()['image']
+        self.assertEqual([error.code for error in errors], [code])
+        self.assertFalse(Post.objects.exists())
+
+    def stored_image(self):
+        return Image.open(Post.objects.latest('pk').image.path)
+
+    def test_image_is_stored_under_posts(self):
+        self.post(image_file())
+        post = Post.objects.get()
+        self.assertTrue(post.image.name.startswith('posts/'))
+        self.assertEqual(self.stored_image().size, (100, 50))
+
+    @override_settings(POST_IMAGE_MAX_BYTES=1000)
+    def test_oversized_file_is_rejected(self):
+        response = self.post(image_file(size=(500, 500), quality=100))
+        self.assertImageError(response, 'file_too_large')
+
+    @override_settings(POST_IMAGE_MAX_PIXELS=1000)
+    def test_too_many_pixels_are_rejected(self):
+        response = self.post(image_file(format_='PNG', name='bomb.png'))
+        self.assertImageError(response, 'too_many_pixels')
+
+    @override_settings(POST_IMAGE_MAX_SIDE=40)
+    def test_large_image_is_downscaled(self):
+        self.post(image_file())
+        self.assertEqual(self.stored_image().size, (40, 20))
+
+    def test_exif_is_stripped(self):
+        exif = Image.Exif()
+        exif[0x010F] = 'camera'
+        exif[0x013B] = 'artist'
+        formats = [('image.jpg', 'JPEG'), ('image.png', 'PNG')]
+        if features.check('webp'):
+            formats.append(('image.webp', 'WEBP'))
+        for name, format_ in formats:
+            with self.subTest(format=format_):
+                self.post(image_file(name, format_=format_,
+                                     exif=exif.tobytes()))
+                stored = self.stored_image()
+                self.assertEqual(stored.format, format_)
+                self.assertEqual(dict(stored.getexif()), {})
+                self.assertNotIn('exif', stored.info)
+
+    @override_settings(POST_IMAGE_MAX_SIDE=40)
+    def test_edit_goes_through_the_same_pipeline(self):
+        post = Post.objects.create(text='text', author=self.user)
+        self.post(image_file(),
+                  reverse('posts:post_edit', kwargs={'post_id': post.pk}))
+        self.assertEqual(self.stored_image().size, (40, 20))
+
+    def test_csrf_is_still_checked(self):
+        response = self.authorized_client.post(
+            reverse('posts:post_create'), {'text': 'text'})
+        self.assertEqual(response.status_code, 403)
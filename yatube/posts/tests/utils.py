@@ -0,0 +1,44 @@
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """Assertions that keep views away from N+1 queries.
+
+    Mix into a ``TestCase``::
+
+        with self.assertQueryBudget(5):
+            self.client.get(url)
+    """
+
+    @contextmanager
+    def assertQueryBudget(self, budget):
+        with CaptureQueriesContext(connection) as queries:
+            yield queries
+        if len(queries) > budget:
+            executed = '\n'.join(
+                f'{i}. {query["sql"]}'
+                for i, query in enumerate(queries.captured_queries, 1))
+            self.fail(f'{len(queries)} queries executed, the budget is '
+                      f'{budget}:\n{executed}')
+
+    def count_queries(self, func, *args, **kwargs):
+        with CaptureQueriesContext(connection) as queries:
+            func(*args, **kwargs)
+        return len(queries)
+
+    def assertConstantQueries(self, func, grow, budget):
+        """Fail if ``func`` runs more queries after ``grow`` adds rows.
+
+        ``func`` must also stay within ``budget`` queries both times.
+        """
+        with self.assertQueryBudget(budget):
+            func()
+        before = self.count_queries(func)
+        grow()
+        with self.assertQueryBudget(budget):
+            func()
+        self.assertEqual(self.count_queries(func), before,
+                         'The number of queries depends on the data')
@@ -0,0 +1,297 @@
+"""Thumbnails built ahead of time by ``manage.py thumbnail_worker``.
+
+Saving a post with a new image queues a ``ThumbnailTask``; the worker
+renders every size of ``THUMBNAIL_SIZES`` with sorl-thumbnail. Templates
+only look the thumbnails up in the sorl key-value store and show a
+placeholder until the worker has been there, so no request resizes images.
+"""
+import itertools
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.utils import timezone
+from PIL import features
+from sorl.thumbnail import default
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings
+from sorl.thumbnail.images import ImageFile
+
+from . import timeline
+from .caching import bump_pages_version
+from .models import Post, ThumbnailTask
+
+logger = logging.getLogger(__name__)
+
+CARD_WIDTH, CARD_HEIGHT = 960, 339
+CARD_WIDTHS = (320, 480, 640, 960)
+# Pillow may be built without libwebp; JPEG alone still gets every width.
+CARD_FORMATS = ('WEBP', 'JPEG') if features.check('webp') else ('JPEG',)
+WORKER_BATCH_SIZE = 50
+REBUILD_CHUNK_SIZE = 8
+
+
+def card_size(width, format_):
+    return f'card-{width}-{format_.lower()}'
+
+
+THUMBNAIL_SIZES = {
+    card_size(width, format_): (
+        f'{width}x{round(width * CARD_HEIGHT / CARD_WIDTH)}',
+        {'crop': 'center', 'upscale': True, 'format': format_},
+    )
+    for format_ in CARD_FORMATS
+    for width in CARD_WIDTHS
+}
+
+
+def enqueue(post):
+    """Queue the thumbnails of a post whose image has just been saved."""
+    if post.image:
+        ThumbnailTask.objects.create(post=post, image=post.image.name)
+
+
+def enqueue_all():
+    """Queue every post with an image; return the number of tasks."""
+    tasks = ThumbnailTask.objects.bulk_create(
+        (ThumbnailTask(post_id=pk, image=image)
+         for pk, image in Post.objects.exclude(image='').values_list(
+             'pk', 'image').iterator()),
+        batch_size=WORKER_BATCH_SIZE * 10,
+    )
+    return len(tasks)
+
+
+def source_file(name):
+    """Return an image name as a sorl file in the storage of ``Post.image``.
+
+    The storage is part of sorl's keys, so a bare name would be looked up
+    in the default storage instead.
+    """
+    return ImageFile(name, Post._meta.get_field('image').storage)
+
+
+def render(name):
+    """Write every size of ``THUMBNAIL_SIZES`` for the image ``name``.
+
+    Touches only the storage, never the database or the key-value store,
+    so it can run in another process. Returns what :func:`store` needs:
+    ``(name, source size, [(thumbnail name, thumbnail size), ...])``.
+    """
+    backend = default.backend
+    source = source_file(name)
+    source_image = default.engine.get_image(source)
+    try:
+        source.set_size(default.engine.get_image_size(source_image))
+        thumbnails = []
+        for geometry, options in THUMBNAIL_SIZES.values():
+            options = thumbnail_options(source, options)
+            thumbnail = thumbnail_file(source, geometry, options)
+            if thumbnail.exists():
+                thumbnail.set_size()
+            else:
+                backend._create_thumbnail(source_image, geometry, options,
+                                          thumbnail)
+            thumbnails.append((thumbnail.name, thumbnail.size))
+    finally:
+        default.engine.cleanup(source_image)
+    return name, source.size, thumbnails
+
+
+def store(rendered):
+    """Record the output of :func:`render` in the sorl key-value store."""
+    name, size, thumbnails = rendered
+    source = source_file(name)
+    source.set_size(size)
+    default.kvstore.get_or_set(source)
+    for thumbnail_name, thumbnail_size in thumbnails:
+        thumbnail = ImageFile(thumbnail_name, default.storage)
+        thumbnail.set_size(thumbnail_size)
+        default.kvstore.set(thumbnail, source)
+
+
+def generate(name):
+    """Build and record every thumbnail of the image ``name``."""
+    store(render(name))
+
+
+def process_tasks(batch_size=WORKER_BATCH_SIZE):
+    """Run one batch of queued tasks and return how many were taken.
+
+    Only one worker is expected to run at a time. A task that fails is
+    logged and dropped: the source image will not get any better.
+    """
+    tasks = list(ThumbnailTask.objects.all()[:batch_size])
+    for task in tasks:
+        try:
+            generate(task.image)
+        except Exception:
+            logger.exception('Thumbnails of %s failed', task.image)
+    ThumbnailTask.objects.filter(pk__in=[task.pk for task in tasks]).delete()
+    if tasks:
+        post_ids = [task.post_id for task in tasks]
+        cards_changed(post_ids)
+        # Cached pages still show the placeholders.
+        bump_pages_version()
+        for author_id in set(Post.objects.filter(
+                pk__in=post_ids).values_list('author_id', flat=True)):
+            timeline.post_changed(author_id)
+    return len(tasks)
+
+
+def cards_changed(post_ids):
+    """Renew the cached feed cards of posts whose thumbnails are ready.
+
+    Cards are cached under ``updated_at``, and ``update()`` moves it
+    without sending signals.
+    """
+    Post.objects.filter(pk__in=post_ids).update(updated_at=timezone.now())
+
+
+def thumbnail_options(source, options):
+    """Return ``options`` completed the way ``get_thumbnail`` does it.
+
+    The options are part of the thumbnail name, so this has to mirror
+    ``ThumbnailBackend.get_thumbnail`` for the names to match sorl's.
+    """
+    backend = default.backend
+    options = dict(options)
+    if settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(settings, attr)
+        if value != getattr(default_settings, attr):
+            options.setdefault(key, value)
+    return options
+
+
+def thumbnail_file(image, geometry, options):
+    """Return the ``ImageFile`` sorl stores the thumbnail of ``image`` as."""
+    source = ImageFile(image)
+    options = thumbnail_options(source, options)
+    name = default.backend._get_thumbnail_filename(source, geometry, options)
+    return ImageFile(name, default.storage)
+
+
+def ready_thumbnail(image, size):
+    """Return the stored thumbnail of ``image`` or ``None`` if not built."""
+    if not image:
+        return None
+    geometry, options = THUMBNAIL_SIZES[size]
+    return default.kvstore.get(thumbnail_file(image, geometry, options))
+
+
+def prefetch(posts, sizes=tuple(THUMBNAIL_SIZES)):
+    """Look up the thumbnails of ``posts`` in one batch before rendering.
+
+    The result is kept on every post for :func:`post_thumbnail`.
+    """
+    files = {}
+    for post in posts:
+        post._thumbnails = {}
+        if post.image:
+            for size in sizes:
+                geometry, options = THUMBNAIL_SIZES[size]
+                files[post.pk, size] = thumbnail_file(post.image, geometry,
+                                                      options)
+    if files:
+        stored = default.kvstore.get_many(files.values())
+        for post in posts:
+            for size in sizes:
+                if (post.pk, size) in files:
+                    post._thumbnails[size] = stored[
+                        files[post.pk, size].key]
+    return posts
+
+
+def post_thumbnail(post, size):
+    """Return the thumbnail of a post, prefetched if possible."""
+    thumbnails = getattr(post, '_thumbnails', None)
+    if thumbnails is None:
+        return ready_thumbnail(post.image, size)
+    return thumbnails.get(size)
+
+
+def post_picture(post):
+    """Return the ``srcset`` of every card format of a post.
+
+    ``None`` until the largest JPEG, the ``src`` fallback, has been built;
+    widths that are not ready yet are left out of the ``srcset``.
+    """
+    src = post_thumbnail(post, card_size(CARD_WIDTH, 'JPEG'))
+    if src is None:
+        return None
+    srcsets = {'webp': None}
+    for format_ in CARD_FORMATS:
+        variants = (post_thumbnail(post, card_size(width, format_))
+                    for width in CARD_WIDTHS)
+        srcsets[format_.lower()] = ', '.join(
+            f'{variant.url} {variant.x}w' for variant in variants if variant)
+    return {'src': src, 'width': CARD_WIDTH, 'height': CARD_HEIGHT,
+            **srcsets}
+
+
+def _render_safely(name):
+    try:
+        return render(name)
+    except Exception as error:
+        return name, None, repr(error)
+
+
+def _init_process():
+    # Processes started with "spawn" instead of "fork" begin unconfigured.
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+
+def rebuild(workers=None, checkpoint=None, report=None):
+    """Build the thumbnails of every post image in a process pool.
+
+    Images are streamed in ``pk`` order and rendered by ``workers``
+    processes; this process records the results in the key-value store.
+    With a ``checkpoint`` file the last finished ``pk`` is saved after
+    every window of images so an interrupted run resumes there; the file
+    is removed when the run completes. ``report`` is called with
+    ``(done, failed, seconds)`` after every window.
+    Returns ``(done, failed)``.
+    """
+    workers = workers or os.cpu_count()
+    last_pk = 0
+    if checkpoint and os.path.exists(checkpoint):
+        with open(checkpoint) as checkpoint_file:
+            last_pk = int(checkpoint_file.read() or 0)
+    posts = (Post.objects.exclude(image='').filter(pk__gt=last_pk)
+             .order_by('pk').values_list('pk', 'image').iterator())
+    window_size = workers * REBUILD_CHUNK_SIZE * 4
+    done = failed = 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(workers, initializer=_init_process) as pool:
+        while True:
+            window = list(itertools.islice(posts, window_size))
+            if not window:
+                break
+            names = sorted({image for _, image in window})
+            for name, size, result in pool.map(
+                    _render_safely, names, chunksize=REBUILD_CHUNK_SIZE):
+                if size is None:
+                    logger.error('Thumbnails of %s failed: %s', name, result)
+                    failed += 1
+                else:
+                    store((name, size, result))
+                    done += 1
+            cards_changed([pk for pk, _ in window])
+            if checkpoint:
+                with open(checkpoint, 'w') as checkpoint_file:
+                    checkpoint_file.write(str(window[-1][0]))
+            if report:
+                report(done, failed, time.perf_counter() - start)
+    if checkpoint and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    if done:
+        bump_pages_version()
+    return done, failed
@@ -0,0 +1,183 @@
+"""Materialized per-user timelines for ``follow_index``.
+
+A new post is copied into the timeline of every follower of its author
+(fan-out on write), so the feed of a user is a range scan over one index.
+Authors with more than ``TIMELINE_FANOUT_LIMIT`` followers are not fanned
+out: their posts are pulled in when the feed is read.
+
+Rendered feed pages are cached per user (``caching.cache_follow_page``).
+A new or changed post bumps the feed versions of the author's followers,
+or the author's own version for a pull author.
+"""
+import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .caching import author_version_key, bump_versions, follow_version_key
+from .models import Follow, Post, Timeline
+from .paginators import FEED_ORDERING
+
+PULL_AUTHORS_KEY = 'posts:timeline:pull_authors'
+PULL_AUTHORS_TIMEOUT = 60 * 5
+PULLED_AT_KEY = 'posts:timeline:pulled_at:{}'
+# Posts committed a little after their pub_date must not slip between pulls.
+PULL_OVERLAP = datetime.timedelta(minutes=1)
+TIMELINE_CURSOR_FIELDS = ('feed_date', 'feed_id')
+TIMELINE_BATCH_SIZE = 500
+
+
+def pull_author_ids():
+    """Return the ids of the authors whose posts are not fanned out."""
+    author_ids = cache.get(PULL_AUTHORS_KEY)
+    if author_ids is None:
+        author_ids = set(
+            Follow.objects.values('author')
+            .annotate(followers=Count('id'))
+            .filter(followers__gt=settings.TIMELINE_FANOUT_LIMIT)
+            .values_list('author', flat=True)
+        )
+        cache.set(PULL_AUTHORS_KEY, author_ids, PULL_AUTHORS_TIMEOUT)
+    return author_ids
+
+
+def followed_pull_author_ids(user):
+    """Return the ids of the pull authors ``user`` follows."""
+    pull_ids = pull_author_ids()
+    if not pull_ids:
+        return []
+    return list(Follow.objects.filter(
+        user=user, author_id__in=pull_ids
+    ).values_list('author_id', flat=True))
+
+
+def _fan_out_followers(author_id):
+    """Return the followers of an author, ``None`` past the fan-out limit."""
+    limit = settings.TIMELINE_FANOUT_LIMIT
+    followers = list(
+        Follow.objects.filter(author_id=author_id)
+        .values_list('user_id', flat=True)[:limit + 1]
+    )
+    return None if len(followers) > limit else followers
+
+
+def _bump_feeds(author_id, followers):
+    # The author version is bumped in any case: the cached set of pull
+    # authors may lag behind the follower count.
+    bump_versions([author_version_key(author_id),
+                   *(follow_version_key(pk) for pk in followers or ())])
+
+
+def fan_out(post):
+    """Add a new post to the timelines of the author's followers."""
+    followers = _fan_out_followers(post.author_id)
+    if followers is not None:
+        Timeline.objects.bulk_create(
+            (Timeline(user_id=user_id, post=post, pub_date=post.pub_date)
+             for user_id in followers),
+            batch_size=TIMELINE_BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+    _bump_feeds(post.author_id, followers)
+
+
+def post_changed(author_id):
+    """Invalidate the cached feeds showing an edited or deleted post."""
+    _bump_feeds(author_id, _fan_out_followers(author_id))
+
+
+def follows_changed(user_id):
+    """Invalidate the cached feed of a user who followed or unfollowed."""
+    bump_versions([follow_version_key(user_id)])
+
+
+def backfill(user_id, author_id):
+    """Copy the recent posts of a newly followed author into a timeline.
+
+    The rows are copied with a single ``INSERT ... SELECT``, so they never
+    travel through Python: ``rebuild`` calls this once per follow.
+    """
+    posts = (
+        Post.objects.filter(author_id=author_id)
+        .order_by(*FEED_ORDERING)
+        .values('pk', 'pub_date')[:settings.TIMELINE_BACKFILL_LIMIT]
+    )
+    select, params = posts.query.sql_with_params()
+    ops = connection.ops
+    columns = ', '.join(ops.quote_name(Timeline._meta.get_field(name).column)
+                        for name in ('user', 'post', 'pub_date'))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'{ops.insert_statement(ignore_conflicts=True)} '
+            f'{ops.quote_name(Timeline._meta.db_table)} ({columns}) '
+            f'SELECT %s, posts.* FROM ({select}) posts '
+            f'{ops.ignore_conflicts_suffix_sql(ignore_conflicts=True)}',
+            (user_id, *params),
+        )
+
+
+def remove(user_id, author_id):
+    """Drop the posts of an unfollowed author from a timeline."""
+    Timeline.objects.filter(
+        user_id=user_id, post__author_id=author_id).delete()
+
+
+@transaction.atomic
+def rebuild(user_ids=None):
+    """Refill timelines from ``Follow``; all of them by default.
+
+    Runs in one transaction, so readers never see a half-built timeline
+    and SQLite does not commit after every follow.
+    """
+    timelines = Timeline.objects.all()
+    follows = Follow.objects.all()
+    if user_ids is not None:
+        timelines = timelines.filter(user_id__in=user_ids)
+        follows = follows.filter(user_id__in=user_ids)
+    timelines.delete()
+    cache.delete(PULL_AUTHORS_KEY)
+    for user_id, author_id in follows.values_list(
+            'user_id', 'author_id').iterator():
+        backfill(user_id, author_id)
+    return timelines.count()
+
+
+def pull(user_id):
+    """Copy the new posts of followed pull authors into a timeline.
+
+    Pull authors are read on demand, one indexed query per author, and the
+    result is stored like a fanned out post, so the feed itself is always
+    read from the timeline alone.
+    """
+    author_ids = followed_pull_author_ids(user_id)
+    if not author_ids:
+        return
+    key = PULLED_AT_KEY.format(user_id)
+    pulled_at = cache.get(key)
+    now = timezone.now()
+    entries = []
+    for author_id in author_ids:
+        posts = Post.objects.filter(author_id=author_id)
+        if pulled_at is not None:
+            posts = posts.filter(pub_date__gte=pulled_at - PULL_OVERLAP)
+        posts = posts.order_by(*FEED_ORDERING).values_list(
+            'pk', 'pub_date')[:settings.TIMELINE_BACKFILL_LIMIT]
+        entries.extend(
+            Timeline(user_id=user_id, post_id=post_id, pub_date=pub_date)
+            for post_id, pub_date in posts
+        )
+    Timeline.objects.bulk_create(entries, batch_size=TIMELINE_BATCH_SIZE,
+                                 ignore_conflicts=True)
+    cache.set(key, now, None)
+
+
+def follow_posts(user):
+    """Return the ``follow_index`` queryset, in timeline index order."""
+    pull(user.pk)
+    return Post.objects.filter(timeline__user=user).annotate(
+        feed_date=F('timeline__pub_date'),
+        feed_id=F('timeline__id'),
+    )
@@ -0,0 +1,127 @@
+"""Memory-bounded handling of post image uploads.
+
+Uploads are streamed to a temporary file that stops growing at
+``POST_IMAGE_MAX_BYTES``. Before a pixel is decoded the image header is
+checked against ``POST_IMAGE_MAX_PIXELS``, so decompression bombs never
+reach Pillow's decoder. Accepted images are re-encoded without EXIF and
+downscaled to ``POST_IMAGE_MAX_SIDE``; for JPEG the decoder itself scales
+down (``Image.draft``), so a huge original is never held in memory at full
+size.
+"""
+import os
+import shutil
+import tempfile
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.template.defaultfilters import filesizeformat
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from PIL import Image, ImageOps
+
+FORMATS = {
+    'JPEG': '.jpg',
+    'PNG': '.png',
+    'GIF': '.gif',
+    'WEBP': '.webp',
+}
+JPEG_QUALITY = 85
+# Encoders write these back from ``image.info``; ICC and transparency stay.
+METADATA_KEYS = ('exif', 'xmp', 'XML:com.adobe.xmp', 'comment')
+
+
+class LimitedUploadHandler(TemporaryFileUploadHandler):
+    """Write every upload to disk and stop writing at the byte cap.
+
+    The rest of an oversized file is read and dropped, so the form still
+    gets the other fields and can report the error.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received <= settings.POST_IMAGE_MAX_BYTES:
+            self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        self.file.too_large = file_size > settings.POST_IMAGE_MAX_BYTES
+        return super().file_complete(file_size)
+
+
+def limit_uploads(view):
+    """Parse the uploads of ``view`` with :class:`LimitedUploadHandler`.
+
+    Upload handlers can only be replaced before ``request.POST`` is read,
+    and CSRF middleware reads it, so the check moves into the view.
+    """
+    protected = csrf_protect(view)
+
+    @csrf_exempt
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        request.upload_handlers = [LimitedUploadHandler(request)]
+        return protected(request, *args, **kwargs)
+    return wrapper
+
+
+def too_large_error():
+    return ValidationError(
+        'Файл больше %(limit)s.',
+        code='file_too_large',
+        params={'limit': filesizeformat(settings.POST_IMAGE_MAX_BYTES)},
+    )
+
+
+def check_image(upload):
+    """Validate an upload from its image header alone."""
+    upload.seek(0)
+    # ``open`` only parses the header; no pixel data is decoded here.
+    image = Image.open(upload)
+    if image.format not in FORMATS:
+        raise ValidationError('Формат %(format)s не поддерживается.',
+                              code='invalid_format',
+                              params={'format': image.format})
+    width, height = image.size
+    if width * height > settings.POST_IMAGE_MAX_PIXELS:
+        raise ValidationError(
+            'Изображение больше %(limit)s мегапикселей.',
+            code='too_many_pixels',
+            params={'limit': settings.POST_IMAGE_MAX_PIXELS // 10 ** 6},
+        )
+    return image
+
+
+def process_image(upload):
+    """Return a copy of ``upload`` re-encoded without metadata and
+    downscaled, spooled to disk past ``FILE_UPLOAD_MAX_MEMORY_SIZE``.
+
+    Animated GIFs within the size limit are copied as they are, since
+    re-encoding would drop all frames but the first.
+    """
+    image = check_image(upload)
+    max_side = settings.POST_IMAGE_MAX_SIDE
+    format_ = image.format
+    processed = tempfile.SpooledTemporaryFile(
+        max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+    if (format_ == 'GIF' and getattr(image, 'is_animated', False)
+            and max(image.size) <= max_side):
+        upload.seek(0)
+        shutil.copyfileobj(upload, processed)
+    else:
+        image.draft('RGB', (max_side, max_side))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_side, max_side))
+        if format_ == 'JPEG' and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        for key in METADATA_KEYS:
+            image.info.pop(key, None)
+        options = {'quality': JPEG_QUALITY} if format_ == 'JPEG' else {}
+        image.save(processed, format_, **options)
+    processed.seek(0)
+    return File(processed,
+                name=os.path.splitext(upload.name)[0] + FORMATS[format_])
@@ -15,6 +15,10 @@ urlpatterns = [
         'posts/<int:post_id>/comment/',
         views.add_comment,
         name='add_comment'),
+    path(
+        'posts/<int:post_id>/comment/json/',
+        views.add_comment_json,
+        name='add_comment_json'),
     path('follow/', views.follow_index, name='follow_index'),
     path(
         'profile/<str:username>/follow/',
@@ -26,4 +30,14 @@ urlpatterns = [
         views.profile_unfollow,
         name='profile_unfollow'
     ),
+    path(
+        'profile/<str:username>/follow/json/',
+        views.profile_follow_json,
+        name='profile_follow_json'
+    ),
+    path(
+        'profile/<str:username>/unfollow/json/',
+        views.profile_unfollow_json,
+        name='profile_unfollow_json'
+    ),
 ]
@@ -1,32 +1,45 @@
-from django.core.paginator import Paginator
-from django.contrib.auth.models import User
+from functools import wraps
+
 from django.contrib.auth.decorators import login_required
+from django.db.models import Prefetch
+from django.http import Http404, JsonResponse
 from django.shortcuts import render, get_object_or_404, redirect
+from django.template.loader import render_to_string
+from django.views.decorators.http import require_POST
 
+from . import (comment_queue, counters, follows, freshness, lookups,
+               thumbnails, timeline)
 from .forms import PostForm, CommentForm
-from .models import Post, Group, User, Comment, Follow
+from .caching import cache_feed_page, cache_follow_page, post_count_key
+from .models import Post, Comment
+from .paginators import paginate
+from .uploads import limit_uploads
 
 
 POST_QUANTITY = 10
 
 
+@freshness.conditional(freshness.index_state)
+@cache_feed_page
 def index(request):
     post_list = Post.objects.select_related('author', 'group')
-    paginator = Paginator(post_list, POST_QUANTITY)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate(request, post_list, POST_QUANTITY,
+                        count_key=post_count_key('all'))
+    thumbnails.prefetch(page_obj)
     context = {
         'page_obj': page_obj,
     }
     return render(request, 'posts/index.html', context)
 
 
+@freshness.conditional(freshness.group_state)
+@cache_feed_page
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    paginator = Paginator(posts, POST_QUANTITY)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    group = lookups.groups.get_or_404(slug)
+    posts = group.posts.select_related('author', 'group')
+    page_obj = paginate(request, posts, POST_QUANTITY,
+                        count_key=post_count_key('group', group.pk))
+    thumbnails.prefetch(page_obj)
     context = {
         'group': group,
         'page_obj': page_obj,
@@ -34,40 +47,48 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+@freshness.conditional(freshness.profile_state, shared=False)
 def profile(request, username):
-
-    username = get_object_or_404(User, username=username)
-    user_posts = Post.objects.filter(author=username)
-    total_num_posts = user_posts.count
-    paginator = Paginator(user_posts, POST_QUANTITY)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    following = False
-    if request.user.is_authenticated:
-        following = Follow.objects.filter(
-            user=request.user,
-            author=username
-        ).exists()
+    # The state is read from the database on every request: the lookup
+    # cache may still hold a user that another worker deleted.
+    state = freshness.page_state(request)
+    if state is None:
+        raise Http404
+    username = lookups.users.get_or_404(username)
+    user_posts = Post.objects.select_related('author', 'group').filter(
+        author=username)
+    page_obj = paginate(request, user_posts, POST_QUANTITY,
+                        count_key=post_count_key('author', username.pk))
+    thumbnails.prefetch(page_obj)
+    author_profile = counters.get_profile(username, state)
+    total_num_posts = author_profile.post_count
+    following = state.get('following', False)
 
     context = {
         'username': username,
         'page_obj': page_obj,
         'total_num_posts': total_num_posts,
+        'author_profile': author_profile,
         'following': following
     }
     return render(request, 'posts/profile.html', context)
 
 
+@freshness.conditional(freshness.post_state)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
-    post_number = Post.objects.filter(
-        author=post.author).count()
+    post = get_object_or_404(
+        Post.objects.select_related('author__profile', 'group')
+        .prefetch_related(Prefetch(
+            'comments',
+            queryset=Comment.objects.select_related('author'))),
+        id=post_id)
+    post_number = counters.get_profile(post.author).post_count
     form = CommentForm(request.POST or None)
-    comments = Comment.objects.filter(post=post)
+    comments = post.comments.all()
 
     context = {
         'post': post,
-        'posts': post_number,
+        'post_number': post_number,
         'form': form,
         'comments': comments
     }
@@ -75,18 +96,22 @@ def post_detail(request, post_id):
 
 
 @login_required()
+@limit_uploads
 def post_create(request):
-    form = PostForm(request.POST or None)
+    form = PostForm(request.POST or None, files=request.FILES or None)
     if request.method == 'POST':
         if form.is_valid():
             post = form.save(False)
             post.author = request.user
             post.save()
+            counters.post_created(post)
+            thumbnails.enqueue(post)
             return redirect('posts:profile', request.user)
     return render(request, 'posts/create_post.html', {'form': form})
 
 
 @login_required
+@limit_uploads
 def post_edit(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     form = PostForm(request.POST or None,
@@ -97,7 +122,9 @@ def post_edit(request, post_id):
         return redirect('posts:post_detail', post_id=post_id)
 
     if form.is_valid():
-        form.save()
+        post = form.save()
+        if 'image' in form.changed_data:
+            thumbnails.enqueue(post)
         return redirect('posts:post_detail', post_id=post_id)
     context = {
         'post': post,
@@ -115,36 +142,80 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        comment.save()
+        comment_queue.save_comment(comment)
     return redirect('posts:post_detail', post_id=post_id)
 
 
 @login_required
+@cache_follow_page(timeline.followed_pull_author_ids)
 def follow_index(request):
-    posts = Post.objects.select_related('author', 'group').filter(
-        author__following__user=request.user)
-    paginator = Paginator(posts, POST_QUANTITY)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    posts = timeline.follow_posts(request.user)
+    page_obj = paginate(request, posts.select_related('author', 'group'),
+                        POST_QUANTITY,
+                        cursor_fields=timeline.TIMELINE_CURSOR_FIELDS,
+                        exact_count=False)
+    thumbnails.prefetch(page_obj)
     context = {'page_obj': page_obj}
     return render(request, 'posts/follow.html', context)
 
 
 @login_required
 def profile_follow(request, username):
-    author = get_object_or_404(User, username=username)
-    user = request.user
-    if author != user:
-        Follow.objects.get_or_create(user=user, author=author)
+    author = lookups.users.get_or_404(username)
+    follows.follow(request.user.pk, author.pk)
     return redirect('posts:profile', username=username)
 
 
 @login_required
 def profile_unfollow(request, username):
-    user_follower = get_object_or_404(
-        Follow,
-        user=request.user,
-        author__username=username
-    )
-    user_follower.delete()
+    author = lookups.users.get_or_404(username)
+    follows.unfollow(request.user.pk, author.pk)
     return redirect('posts:profile', username=username)
+
+
+def json_login_required(view):
+    """Answer anonymous requests with 401 rather than a login redirect."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': 'Требуется авторизация.'},
+                                status=401)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+@json_login_required
+@require_POST
+def add_comment_json(request, post_id):
+    post = get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    form = CommentForm(request.POST)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+    comment = form.save(commit=False)
+    comment.author = request.user
+    comment.post = post
+    if comment_queue.save_comment(comment) is None:
+        return JsonResponse({'queued': True}, status=202)
+    html = render_to_string('includes/comment.html', {'comment': comment},
+                            request)
+    comment_count = Post.objects.filter(pk=post_id).values_list(
+        'comment_count', flat=True).first()
+    return JsonResponse({'html': html, 'comment_count': comment_count},
+                        status=201)
+
+
+@json_login_required
+@require_POST
+def profile_follow_json(request, username):
+    author = lookups.users.get_or_404(username)
+    follows.follow(request.user.pk, author.pk)
+    return JsonResponse(follows.follow_state(
+        author.pk, following=author.pk != request.user.pk))
+
+
+@json_login_required
+@require_POST
+def profile_unfollow_json(request, username):
+    author = lookups.users.get_or_404(username)
+    follows.unfollow(request.user.pk, author.pk)
+    return JsonResponse(follows.follow_state(author.pk, following=False))
@@ -0,0 +1,32 @@
+"""Authentication backend that keeps ``request.user`` in the cache.
+
+``AuthenticationMiddleware`` loads the user of the session on every
+request. :class:`CachedModelBackend` serves that load from the shared
+cache for ``USER_CACHE_TIMEOUT`` seconds. Saving or deleting a user drops
+the entry, so password changes, deactivation and logins are seen by the
+next request; ``users.signals`` connects that.
+"""
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+USER_CACHE_TIMEOUT = 60 * 5
+USER_KEY = 'users:user:{}'
+
+
+def user_key(user_id):
+    return USER_KEY.format(user_id)
+
+
+def forget_user(user_id):
+    cache.delete(user_key(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        key = user_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, USER_CACHE_TIMEOUT)
+        return user
@@ -0,0 +1,54 @@
+from unittest import mock
+
+from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth.hashers import get_hasher
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+User = get_user_model()
+
+
+class CachedAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='auth',
+                                             password='password')
+        self.client = Client()
+        self.client.login(username='auth', password='password')
+        self.url = reverse('about:author')
+
+    def get_user(self):
+        return self.client.get(self.url).wsgi_request.user
+
+    def test_session_and_user_are_served_from_the_cache(self):
+        self.assertEqual(self.get_user(), self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_user(), self.user)
+
+    def test_password_change_ends_other_sessions(self):
+        self.get_user()
+        self.user.set_password('changed')
+        self.user.save()
+        self.assertFalse(self.get_user().is_authenticated)
+
+    def test_deactivated_user_is_logged_out(self):
+        self.get_user()
+        self.user.is_active = False
+        self.user.save()
+        self.assertFalse(self.get_user().is_authenticated)
+
+    def test_sessions_survive_a_cache_flush(self):
+        self.get_user()
+        cache.clear()
+        self.assertEqual(self.get_user(), self.user)
+
+    def test_rejected_login_hashes_the_password_once(self):
+        hasher = get_hasher()
+        for username in ('auth', 'unknown'):
+            with self.subTest(username=username), mock.patch.object(
+                    type(hasher), 'encode', autospec=True,
+                    side_effect=type(hasher).encode) as encode:
+                self.assertIsNone(
+                    authenticate(username=username, password='wrong'))
+                self.assertEqual(encode.call_count, 1)
@@ -62,17 +62,38 @@ MIDDLEWARE = [
 ROOT_URLCONF = 'yatube.urls'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Serve MEDIA_URL through core.media.serve_media even without DEBUG.
+MEDIA_SERVE = True
+# Let the front server send media files: 'X-Sendfile' (Apache, lighttpd)
+# or 'X-Accel-Redirect' (nginx); empty to send them from Django.
+MEDIA_SENDFILE = ''
+# Internal nginx location that maps to MEDIA_ROOT for X-Accel-Redirect.
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+# Cache lifetime of media files whose names are not content hashes.
+MEDIA_CACHE_MAX_AGE = 60 * 60
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
 STATIC_URL = '/static/'
 
+template_loaders = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+if not DEBUG:
+    # Compiled templates are kept for the life of the process: restart the
+    # server after editing a template. core.warmup fills the cache when a
+    # worker starts. With DEBUG templates are read again on every render.
+    template_loaders = [
+        ('django.template.loaders.cached.Loader', template_loaders),
+    ]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': template_loaders,
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -85,13 +106,35 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
+TEST_RUNNER = 'core.runner.IsolatedCacheRunner'
 
+# Where the SQLite caches live. Tests and benchmarks move them to a
+# temporary directory (core.cache.isolated_caches).
+CACHE_DIR = os.environ.get('YATUBE_CACHE_DIR',
+                           os.path.join(BASE_DIR, '../cache'))
 CACHES = {
+    # One cache for every server process on the host; see core.cache.
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+        'BACKEND': 'core.cache.SQLiteCache',
+        'LOCATION': os.path.join(CACHE_DIR, 'default.sqlite3'),
+        'OPTIONS': {
+            'MAX_BYTES': 256 * 1024 * 1024,
+        },
+    },
+    # Shared by all processes, so the thumbnail lookups of one worker warm
+    # the others.
+    'thumbnails': {
+        'BACKEND': 'core.cache.SQLiteCache',
+        'LOCATION': os.path.join(CACHE_DIR, 'thumbnails.sqlite3'),
+        'OPTIONS': {
+            'MAX_BYTES': 64 * 1024 * 1024,
+        },
+    },
 }
 
+THUMBNAIL_KVSTORE = 'posts.kvstore.KVStore'
+THUMBNAIL_CACHE = 'thumbnails'
+
 
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
@@ -136,6 +179,29 @@ USE_TZ = True
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:main_posts'
+# Sessions are read from the cache and written through to the database.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+# request.user comes from the cache too. Sessions opened under ModelBackend
+# are not recognised and log in once more.
+AUTHENTICATION_BACKENDS = [
+    'users.backends.CachedModelBackend',
+]
+
+# Posts of authors with more followers than this are not copied into the
+# followers' timelines but read on demand by follow_index.
+TIMELINE_FANOUT_LIMIT = 1000
+# How many recent posts of an author land in a timeline on follow.
+TIMELINE_BACKFILL_LIMIT = 1000
+# Write new comments through one writer thread per process in batched
+# transactions, instead of from every request (posts.comment_queue).
+COMMENT_WRITE_QUEUE = False
+
+# Uploads above this size are rejected without being kept on disk.
+POST_IMAGE_MAX_BYTES = 10 * 1024 * 1024
+# Images are rejected from their header when they decode to more pixels.
+POST_IMAGE_MAX_PIXELS = 40 * 10 ** 6
+# Longer sides are scaled down before the original is stored.
+POST_IMAGE_MAX_SIDE = 2048
 
 
 # Static files (CSS, JavaScript, Images)
@@ -1,7 +1,10 @@
+import re
+
 from django.contrib import admin
 from django.conf import settings
-from django.conf.urls.static import static
-from django.urls import include, path
+from django.urls import include, path, re_path
+
+from core.media import serve_media
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -16,7 +19,8 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 handler500 = 'core.views.server_error'
 handler403 = 'core.views.permission_denied'
 
-if settings.DEBUG:
-    urlpatterns += static(
-        settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
-    )
+if settings.DEBUG or settings.MEDIA_SERVE:
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.*)$' % re.escape(
+            settings.MEDIA_URL.lstrip('/')), serve_media),
+    ]
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+# Compile the templates and the URLs before the first request comes in.
+from core.warmup import warmup  # noqa: E402
+
+warmup()